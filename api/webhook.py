@@ -6,14 +6,28 @@ from app.main import create_application
 from app.responses import db
 from app.constants import ADMIN_ID
 from app.scheduler import start_scheduler
+from app.broadcast import resume_broadcasts
+from app.ingest import UpdateIngestor
+from app.dedupe import UpdateDeduplicator
+from app.backlog import BacklogFilter
+from app.intent_cache import intent_cache
+from app.plan_cache import plan_cache
+from app.ai import close_ai_clients, router as ai_router
 from contextlib import asynccontextmanager
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Telegram Application via factory
-telegram_app = create_application()
+# Initialize Telegram Application via factory (replays are dropped here, before queueing)
+telegram_app = create_application(dedupe=False)
+dedupe = UpdateDeduplicator()
+# Telegram pushes whatever queued up during a redeploy; thin it out before handling
+backlog = BacklogFilter()
+
+# Queue mode: acknowledge Telegram at once and process updates on background workers.
+# Needs a long-lived process (e.g. Render); leave off on serverless hosts.
+ingestor = UpdateIngestor(telegram_app) if os.getenv("WEBHOOK_QUEUE", "false").lower() == "true" else None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -21,6 +35,10 @@ async def lifespan(app: FastAPI):
     # Initialize Bot
     if not telegram_app._initialized:
         await telegram_app.initialize()
+    # post_init only runs under run_polling/run_webhook, so resume interrupted broadcasts here
+    await resume_broadcasts(telegram_app.bot)
+    if ingestor:
+        await ingestor.start()
     
     # Start Scheduler (for Render persistent background tasks)
     if db and ADMIN_ID:
@@ -33,8 +51,11 @@ async def lifespan(app: FastAPI):
             
     yield
     # Shutdown logic if needed
+    if ingestor and ingestor.running:
+        await ingestor.stop()
     if telegram_app._initialized:
         await telegram_app.shutdown()
+    await close_ai_clients()
 
 # Initialize FastAPI with Lifespan
 app = FastAPI(lifespan=lifespan)
@@ -48,7 +69,23 @@ async def webhook(request: Request):
             await telegram_app.initialize()
             
         data = await request.json()
+        if not isinstance(data, dict) or "update_id" not in data:
+            return Response(status_code=400)
         update = Update.de_json(data, telegram_app.bot)
+        if not dedupe.add(update.update_id):
+            logger.info(f"🔁 Dropping replayed update {update.update_id}")
+            return Response(status_code=200)
+        if not backlog.keep(update):
+            return Response(status_code=200)
+
+        if ingestor and ingestor.running:
+            if not ingestor.submit(update):
+                # Backpressure: Telegram redelivers failed webhook calls later
+                dedupe.discard(update.update_id)
+                logger.warning(f"⚠️ Update queue full, rejecting update {update.update_id}")
+                return Response(status_code=503, headers={"Retry-After": "5"})
+            return Response(status_code=200)
+
         await telegram_app.process_update(update)
     except Exception as e:
         logger.error(f"❌ Error processing update: {e}", exc_info=True)
@@ -73,5 +110,12 @@ async def index():
             "status": db_status,
             "members_loaded": member_count,
             "sheets_enabled": os.getenv("ENABLE_SHEETS", "true")
-        }
+        },
+        "outbound": telegram_app.bot.rate_limiter.metrics() if telegram_app.bot.rate_limiter else None,
+        "ingest": ingestor.metrics() if ingestor else None,
+        "replays_dropped": dedupe.dropped,
+        "backlog": backlog.summary(),
+        "intent_cache": intent_cache.stats(),
+        "plan_cache": plan_cache.stats(),
+        "ai": ai_router.metrics()
     }
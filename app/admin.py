@@ -4,7 +4,10 @@ from telegram.ext import ContextTypes, ConversationHandler
 import datetime
 
 from app.responses import db
-from app.ai import ask_ai
+from app.ai import ask_ai_async
+from app.broadcast import start_broadcast
+from app.outbound import BULK_SEND
+from app.payment_callbacks import handle_payment_callback
 from app.constants import (
     IDLE, ADMIN_SEARCH, ADMIN_BROADCAST, 
     RENEW_AMOUNT, RENEW_DURATION, ADMIN_TARGETED_BROADCAST,
@@ -62,6 +65,7 @@ async def handle_admin_intelligence_menu(update: Update, context: ContextTypes.D
 async def handle_admin_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lists all members - both active and inactive."""
     all_members = db.get_all_members()
+    snap = db.snapshot
     active_members = [m for m in all_members if m.get("Status") == "Active"]
     inactive_members = [m for m in all_members if m.get("Status") != "Active"]
     
@@ -75,7 +79,7 @@ async def handle_admin_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = f"✅ *Active Members ({len(active_members)})*\n━━━━━━━━━━━━━━\n\n"
     if active_members:
         for m in active_members:
-            msg += format_member_list_concise(m) + "\n\n"  # Double newline for spacing
+            msg += snap.members.render(m, "list", format_member_list_concise) + "\n\n"  # Double newline for spacing
     else:
         msg += "_No active members_\n\n"
     
@@ -83,7 +87,7 @@ async def handle_admin_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg += f"🚫 *Inactive Members ({len(inactive_members)})*\n━━━━━━━━━━━━━━\n\n"
     if inactive_members:
         for m in inactive_members:
-            msg += format_member_list_concise(m) + "\n\n"  # Double newline for spacing
+            msg += snap.members.render(m, "list", format_member_list_concise) + "\n\n"  # Double newline for spacing
     else:
         msg += "_No inactive members_\n\n"
     
@@ -160,6 +164,8 @@ async def handle_admin_revenue(update: Update, context: ContextTypes.DEFAULT_TYP
         f"📝 *Recent Payments Breakdown:*\n"
         f"{recent_detail or 'No recent payments found.'}"
     )
+    if stats.get("stale"):
+        msg += "\n\n_⚠️ Google Sheets is unreachable - figures are from the last successful sync._"
     await update.message.reply_text(msg, parse_mode="Markdown")
     return IDLE
 
@@ -531,7 +537,7 @@ async def handle_admin_ai_advisor(update: Update, context: ContextTypes.DEFAULT_
             f"Give 3 short, professional 'Admin Tips' to improve the gym."
         )
         
-        advice = ask_ai(prompt)
+        advice = await ask_ai_async(prompt, sections=("fees",))
         if not advice or len(advice) < 10:
             advice = "1. Review inactive members list.\n2. Plan a weekend special class.\n3. Check gym equipment maintenance."
             
@@ -565,29 +571,16 @@ async def handle_admin_broadcast_send(update: Update, context: ContextTypes.DEFA
             return IDLE
 
         members = db.get_all_members(status="Active")
-        success_count = 0
-        fail_count = 0
         status_msg = await update.message.reply_text(f"📤 Sending to {len(members)} members...")
 
         # FIX #2: Single announcement message to members
         admin_formatted_msg = f"📢 *GYM ANNOUNCEMENT*\n\n{broadcast_text}"
 
-        for m in members:
-            try:
-                await context.bot.send_message(chat_id=m['User ID'], text=admin_formatted_msg, parse_mode="Markdown")
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to broadcast to {m['User ID']}: {e}")
-                fail_count += 1
-
-        # FIX #2: Single merged message with navigation buttons
-        await status_msg.edit_text(
-            f"✅ *Broadcast Complete*\n\n📈 Results:\n• Sent: {success_count}\n• Failed: {fail_count}",
-            parse_mode="Markdown"
-        )
-        # Removed automatic "Returning to Membership Hub" message - let user navigate manually
+        # Sent in the background; the status message above is edited with progress and the final results
+        start_broadcast(context.application, [m['User ID'] for m in members], admin_formatted_msg,
+                        title="Broadcast Complete", status_message=status_msg)
         await update.message.reply_text(
-            "Broadcast sent successfully!",
+            "Broadcast started - progress is shown above.",
             reply_markup=get_keyboard("admin_membership_menu", update.effective_user.id)
         )
     except Exception as e:
@@ -605,6 +598,11 @@ async def admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         action = parts[0]
         target_user_id = parts[1] if len(parts) > 1 else None
         
+        # Payment due digest buttons (answer the query themselves)
+        if action in ("paid", "notpaid", "duepg"):
+            await handle_payment_callback(update, context)
+            return IDLE
+        
         await query.answer()
 
         # FIX #1: Edit Member Handlers
@@ -676,7 +674,8 @@ async def admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     chat_id=target_user_id,
                     text="🎊 *Congratulations!*\nYour membership at *Jashpur Fitness Club* has been approved! Welcome! 💪",
                     reply_markup=get_keyboard("main_menu", int(target_user_id)),
-                    parse_mode="Markdown"
+                    parse_mode="Markdown",
+                    rate_limit_args=BULK_SEND
                 )
             except: pass
                 
@@ -704,7 +703,8 @@ async def admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     chat_id=target_user_id,
                     text=msg,
                     reply_markup=ReplyKeyboardRemove(),
-                    parse_mode="Markdown"
+                    parse_mode="Markdown",
+                    rate_limit_args=BULK_SEND
                 )
             except: pass
 
@@ -735,13 +735,8 @@ async def admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             }
             text = templates.get(category, "👋 Quick reminder from your gym regarding your membership!")
             
-            success = 0
-            for uid in targets:
-                try:
-                    await context.bot.send_message(chat_id=uid, text=text, parse_mode="Markdown")
-                    success += 1
-                except: pass
-            await query.edit_message_text(f"✅ *Reminders Sent*: {success}/{len(targets)} members notified.")
+            status_msg = await query.edit_message_text(f"📤 Sending reminders to {len(targets)} members...")
+            start_broadcast(context.application, targets, text, title="Reminders Sent", status_message=status_msg)
 
         elif action == "blkm":
             targets = context.user_data.get('bulk_targets', [])
@@ -771,17 +766,16 @@ async def handle_edit_member_field(update: Update, context: ContextTypes.DEFAULT
             await update.message.reply_text("❌ Edit session expired. Please search for the member again.")
             return IDLE
         
-        member = db.get_member(user_id)
+        # Read member and row number from one snapshot so the row can't shift underneath us
+        db.refresh_cache("members")
+        snap = db.snapshot
+        member = snap.members.by_id.get(str(user_id))
         if not member:
             await update.message.reply_text(f"❌ Member {user_id} not found.")
             return IDLE
         
         # Find the member row
-        row_idx = -1
-        for i, m in enumerate(db.data.get("members", [])):
-            if str(m.get("User ID")) == str(user_id):
-                row_idx = i + 2  # +1 for 1-indexing, +1 for headers
-                break
+        row_idx = snap.members.row_numbers.get(str(user_id), -1)
         
         if row_idx == -1:
             await update.message.reply_text(f"❌ Could not find member row.")
@@ -789,21 +783,21 @@ async def handle_edit_member_field(update: Update, context: ContextTypes.DEFAULT
         
         # Update based on field
         if field == 'name':
-            db.members_sheet.update_cell(row_idx, 2, new_value)  # Column B = Full Name
+            db.update_member_field(user_id, 2, new_value)  # Column B = Full Name
             await update.message.reply_text(
                 f"✅ Name updated to: *{new_value}*",
                 reply_markup=get_keyboard("admin_membership_menu", update.effective_user.id),
                 parse_mode="Markdown"
             )
         elif field == 'phone':
-            db.members_sheet.update_cell(row_idx, 3, new_value)  # Column C = Phone
+            db.update_member_field(user_id, 3, new_value)  # Column C = Phone
             await update.message.reply_text(
                 f"✅ Phone updated to: *{new_value}*",
                 reply_markup=get_keyboard("admin_membership_menu", update.effective_user.id),
                 parse_mode="Markdown"
             )
         elif field == 'address':
-            db.members_sheet.update_cell(row_idx, 4, new_value)  # Column D = Address
+            db.update_member_field(user_id, 4, new_value)  # Column D = Address
             await update.message.reply_text(
                 f"✅ Address updated to: *{new_value}*",
                 reply_markup=get_keyboard("admin_membership_menu", update.effective_user.id),
@@ -811,7 +805,7 @@ async def handle_edit_member_field(update: Update, context: ContextTypes.DEFAULT
             )
         
         # Refresh cache
-        db.refresh_cache(force=True)
+        db.refresh_cache("members", force=True)
         
         # Clear edit session
         context.user_data.pop('edit_user_id', None)
@@ -851,7 +845,8 @@ async def admin_renew_duration(update: Update, context: ContextTypes.DEFAULT_TYP
                 await context.bot.send_message(
                     chat_id=target_uid,
                     text=f"🔄 *Membership Renewed!*\nYour membership has been extended until **{renewed_member['expiry_date']}**. 💪",
-                    parse_mode="Markdown"
+                    parse_mode="Markdown",
+                    rate_limit_args=BULK_SEND
                 )
             except: pass
         else:
@@ -869,11 +864,6 @@ async def handle_admin_targeted_broadcast_send(update: Update, context: ContextT
         await update.message.reply_text("❌ No users to message.")
         return IDLE
 
-    success = 0
-    for uid in targets:
-        try:
-            await context.bot.send_message(chat_id=uid, text=msg_text, parse_mode="Markdown")
-            success += 1
-        except: pass
-    await update.message.reply_text(f"✅ *Custom Messages Sent*: {success}/{len(targets)}")
+    status_msg = await update.message.reply_text(f"📤 Sending to {len(targets)} members...")
+    start_broadcast(context.application, targets, msg_text, title="Custom Messages Sent", status_message=status_msg)
     return IDLE
@@ -1,6 +1,11 @@
 import os
 import json
-from openai import OpenAI
+import time
+import asyncio
+import logging
+from typing import List, Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI
 try:
     import google.generativeai as genai
 except ImportError:
@@ -8,19 +13,49 @@ except ImportError:
 
 from dotenv import load_dotenv
 
+from app.ai_router import AIRouter, AllProvidersFailed
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "25"))  # Seconds per AI call, including retries
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", "20"))
+TIMEOUT_REPLY = "⚠️ AI Error: the assistant took too long to answer. Please try again."
+AI_HEDGE_AFTER = float(os.getenv("AI_HEDGE_AFTER", "2.5"))     # Latency-critical calls race the other provider after this
+AI_INTENT_BUDGET = float(os.getenv("AI_INTENT_BUDGET", "8"))   # Whole budget for an intent classification
+AI_COMBINED_BUDGET = float(os.getenv("AI_COMBINED_BUDGET", "15"))  # Classification plus a short answer in one call
+PROVIDER_NAMES = {"openai": "OpenAI", "gemini": "Gemini"}
+
 # Global client variables
 _openai_client = None
 _gemini_model = None
+_async_openai_client = None
+_async_http = None
+_async_loop = None
+_file_context = None
+_prompt_context = None
+_prompt_cache = {}
 
-def get_ai_provider():
-    """Determine which AI provider to use based on available keys."""
+# Slices of gym info a caller can ask for; None means all of them
+CONTEXT_SECTIONS = ("contact", "timings", "fees", "trainers", "facilities", "rules", "faq")
+
+def configured_providers() -> List[str]:
+    """Providers with an API key, in order of preference."""
+    providers = []
     if os.getenv("OPENAI_API_KEY"):
-        return "openai"
+        providers.append("openai")
     if os.getenv("GEMINI_API_KEY") and genai:
-        return "gemini"
-    return None
+        providers.append("gemini")
+    return providers
+
+# Picks between configured providers by recent latency/error rate (OpenAI preferred on a tie)
+router = AIRouter(configured_providers, order=["openai", "gemini"])
+
+def get_ai_provider():
+    """Determine which AI provider to use: the router's current best among those with keys."""
+    ranked = router.ranked()
+    return ranked[0] if ranked else None
 
 def get_openai_client():
     global _openai_client
@@ -39,6 +74,29 @@ def get_gemini_model():
             _gemini_model = genai.GenerativeModel('gemini-1.5-flash')
     return _gemini_model
 
+def get_async_openai_client():
+    """AsyncOpenAI over one shared keep-alive connection pool (rebuilt if the event loop changes)."""
+    global _async_openai_client, _async_http, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_openai_client is None or _async_loop is not loop:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        _async_http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=AI_MAX_CONNECTIONS, max_keepalive_connections=AI_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(AI_TIMEOUT, connect=5.0),
+        )
+        _async_openai_client = AsyncOpenAI(api_key=api_key, http_client=_async_http, max_retries=1)
+        _async_loop = loop
+    return _async_openai_client
+
+async def close_ai_clients():
+    """Close the shared connection pool (call on shutdown)."""
+    global _async_openai_client, _async_http, _async_loop
+    if _async_http is not None:
+        await _async_http.aclose()
+    _async_openai_client = _async_http = _async_loop = None
+
 def get_gym_context():
     try:
         from app.responses import db
@@ -47,26 +105,53 @@ def get_gym_context():
     except Exception as e:
         print(f"⚠️ Error getting dynamic gym context: {e}")
     
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    INFO_PATH = os.path.join(BASE_DIR, "gym_info.json")
-    try:
-        if os.path.exists(INFO_PATH):
-            with open(INFO_PATH, "r") as f:
-                return json.load(f)
-    except: pass
-    return {}
+    global _file_context
+    if _file_context is None:
+        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+        INFO_PATH = os.path.join(BASE_DIR, "gym_info.json")
+        _file_context = {}
+        try:
+            if os.path.exists(INFO_PATH):
+                with open(INFO_PATH, "r") as f:
+                    _file_context = json.load(f)
+        except: pass
+    return _file_context
 
-def ask_ai(prompt: str) -> str:
+def build_system_prompt(context: dict, sections=None) -> str:
+    """
+    Fixed instructions first, then only the requested slices of gym info as compact JSON, so the
+    text is byte-identical across calls (providers cache repeated prompt prefixes).
+    """
+    wanted = CONTEXT_SECTIONS if sections is None else sections
+    data = {key: context[key] for key in CONTEXT_SECTIONS if key in wanted and context.get(key)}
+    prompt = (
+        f"You are an intelligent assistant for {context.get('gym_name', 'our gym')}.\n"
+        f"If the user asks about something the gym information does not cover, provide a helpful general "
+        f"response or suggest they contact the gym staff at {context.get('contact', {}).get('phone') or 'the counter'}.\n"
+    )
+    if data:
+        prompt += f"\nGym information:\n{json.dumps(data, separators=(',', ':'), sort_keys=True, ensure_ascii=False)}\n"
+    return prompt
+
+def get_system_prompt(sections=None) -> str:
+    """
+    Rendered system prompt for these context sections. Rendered once per gym-info version:
+    db.get_gym_info() keeps returning the same dict until an info sheet changes.
+    """
+    global _prompt_context, _prompt_cache
     context = get_gym_context()
-    provider = get_ai_provider()
-    
-    system_prompt = f"""
-You are an intelligent assistant for {context.get('gym_name', 'our gym')}. 
-Use the following gym information to answer user queries:
-{json.dumps(context, indent=2)}
+    if context is not _prompt_context:
+        _prompt_context, _prompt_cache = context, {}
+    key = None if sections is None else tuple(sections)
+    prompt = _prompt_cache.get(key)
+    if prompt is None:
+        prompt = _prompt_cache[key] = build_system_prompt(context, sections)
+    return prompt
 
-If the user asks about something not in the information above, provide a helpful general response or suggest they contact the gym staff at {context.get('contact', {}).get('phone', 'the counter')}.
-"""
+def ask_ai(prompt: str, sections=None) -> str:
+    """Blocking version of ask_ai_async, for scripts and worker threads."""
+    provider = get_ai_provider()
+    system_prompt = get_system_prompt(sections)
     
     if provider == "openai":
         try:
@@ -94,3 +179,146 @@ If the user asks about something not in the information above, provide a helpful
             
     else:
         return "❌ AI Error: No API keys configured (OpenAI or Gemini)."
+
+async def _complete(provider: str, system_prompt: str, prompt: str, json_mode: bool, max_tokens: int) -> str:
+    """One non-streaming completion from `provider`; raises on any failure."""
+    if provider == "openai":
+        client = get_async_openai_client()
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            **({"response_format": {"type": "json_object"}} if json_mode else {})
+        )
+        return response.choices[0].message.content.strip()
+
+    model = get_gemini_model()
+    full_prompt = f"{system_prompt}\n\nUser Question: {prompt}"
+    config = {"response_mime_type": "application/json"} if json_mode else None
+    response = await model.generate_content_async(full_prompt, generation_config=config)
+    return response.text.strip()
+
+def _error_reply(failure: AllProvidersFailed) -> str:
+    """The user-facing text for a call no provider could answer (same wording as before routing)."""
+    if not failure.errors:
+        return "❌ AI Error: No API keys configured (OpenAI or Gemini)."
+    if failure.timed_out:
+        return TIMEOUT_REPLY
+    provider, error = list(failure.errors.items())[-1]
+    return f"⚠️ {PROVIDER_NAMES[provider]} Error: {error}"
+
+async def ask_ai_async(prompt: str, timeout: float = AI_TIMEOUT, sections=None,
+                       json_mode: bool = False, max_tokens: int = 500,
+                       hedge_after: Optional[float] = None) -> str:
+    """
+    Non-blocking ask_ai for handlers and scheduler jobs: many calls can be in flight at once.
+    `timeout` is the call's latency budget across all providers; cancelling the caller cancels the request.
+    `sections` picks the gym-info slices the model needs (e.g. () for pure classification);
+    `json_mode` asks the provider for a JSON object reply;
+    `hedge_after` races a second provider when the first has not answered after that many seconds.
+    """
+    system_prompt = await asyncio.to_thread(get_system_prompt, sections)  # May hit Sheets when the cache is cold
+    try:
+        _, text = await router.complete(
+            lambda provider, _: _complete(provider, system_prompt, prompt, json_mode, max_tokens),
+            timeout, hedge_after
+        )
+        return text
+    except AllProvidersFailed as e:
+        return _error_reply(e)
+
+async def _until(deadline: float, chunks):
+    """Iterate an async stream, raising asyncio.TimeoutError once the loop clock passes `deadline`."""
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    while True:
+        try:
+            yield await asyncio.wait_for(iterator.__anext__(), max(0.01, deadline - loop.time()))
+        except StopAsyncIteration:
+            return
+
+async def _stream_pieces(provider: str, system_prompt: str, prompt: str):
+    if provider == "openai":
+        client = get_async_openai_client()
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
+        return
+
+    model = get_gemini_model()
+    full_prompt = f"{system_prompt}\n\nUser Question: {prompt}"
+    response = await model.generate_content_async(full_prompt, stream=True)
+    async for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+class AIStream:
+    """
+    Streaming ask_ai_async: iterate it for the answer in pieces as the provider generates it.
+    A provider that fails before its first piece is skipped for the next one (within `timeout`).
+    Errors and timeouts are yielded as text too, so callers can simply show whatever arrives;
+    `ok` tells afterwards whether that was a complete answer (worth keeping) or not.
+    """
+
+    def __init__(self, prompt: str, timeout: float = AI_TIMEOUT, sections=None):
+        self.prompt = prompt
+        self.timeout = timeout
+        self.sections = sections
+        self.ok = False
+
+    def __aiter__(self):
+        return self._pieces()
+
+    async def _pieces(self):
+        system_prompt = await asyncio.to_thread(get_system_prompt, self.sections)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        errors = {}
+
+        for provider in router.ranked():
+            if loop.time() >= deadline:
+                break
+            started = time.monotonic()
+            first = True
+            pieces = _stream_pieces(provider, system_prompt, self.prompt)
+            try:
+                async for piece in _until(deadline, pieces):
+                    if first:
+                        router.record(provider, started, True)  # Latency = time to first piece
+                        first = False
+                    yield piece
+                self.ok = not first  # An empty stream is no answer
+                return
+            except Exception as e:
+                if not first:
+                    # Already showing part of the answer: say it was cut short rather than start over
+                    reason = TIMEOUT_REPLY if isinstance(e, asyncio.TimeoutError) else f"⚠️ {PROVIDER_NAMES[provider]} Error: {e}"
+                    yield f"\n\n{reason}"
+                    return
+                router.record(provider, started, False)
+                errors[provider] = e
+                logger.warning(f"⚠️ AI stream from {provider} failed: {e!r}")
+            finally:
+                await pieces.aclose()
+
+        yield _error_reply(AllProvidersFailed(errors))
+
+def stream_ai(prompt: str, timeout: float = AI_TIMEOUT, sections=None) -> AIStream:
+    """Stream an answer to `prompt`; see AIStream."""
+    return AIStream(prompt, timeout, sections)
@@ -0,0 +1,157 @@
+"""
+AI Provider Router
+Ranks providers by rolling latency and error rate, fails over on errors and hedges slow calls
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AI_STATS_WINDOW = int(os.getenv("AI_STATS_WINDOW", "50"))  # Calls remembered per provider
+AI_COOLDOWN = float(os.getenv("AI_COOLDOWN", "30"))        # Seconds a provider sits out after repeated failures
+FAILURE_STREAK = 3
+
+# call(provider, timeout) -> awaitable result; must raise on failure
+ProviderCall = Callable[[str, float], Awaitable[Any]]
+
+
+class AllProvidersFailed(Exception):
+    """Every provider failed or the latency budget ran out. `errors` maps provider -> exception."""
+
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        super().__init__("; ".join(f"{p}: {e!r}" for p, e in errors.items()) or "no AI provider configured")
+
+    @property
+    def timed_out(self) -> bool:
+        return bool(self.errors) and all(isinstance(e, asyncio.TimeoutError) for e in self.errors.values())
+
+
+class ProviderStats:
+    """Rolling window of (latency, ok) for one provider."""
+
+    def __init__(self, window: int = AI_STATS_WINDOW):
+        self.calls: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.streak = 0
+        self.cooldown_until = 0.0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.calls.append((latency, ok))
+        self.streak = 0 if ok else self.streak + 1
+        if self.streak >= FAILURE_STREAK:
+            self.cooldown_until = time.monotonic() + AI_COOLDOWN
+
+    @property
+    def error_rate(self) -> float:
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls) if self.calls else 0.0
+
+    @property
+    def latency(self) -> float:
+        """Mean latency of successful calls (0 until there are some)."""
+        good = [lat for lat, ok in self.calls if ok]
+        return sum(good) / len(good) if good else 0.0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+class AIRouter:
+    """
+    `available()` returns the providers that are configured right now (keys may change at runtime);
+    `order` breaks ties, so the preferred provider wins until the numbers say otherwise.
+    """
+
+    def __init__(self, available: Callable[[], List[str]], order: List[str]):
+        self.available = available
+        self.order = order
+        self.stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in order}
+        self.hedged = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[str]:
+        """Configured providers, best first: not cooling down, then error rate, then latency."""
+        def score(name: str):
+            s = self.stats[name]
+            return (s.cooling_down, round(s.error_rate, 1), s.latency, self.order.index(name))
+        return sorted(self.available(), key=score)
+
+    def record(self, provider: str, started: float, ok: bool) -> None:
+        self.stats[provider].record(time.monotonic() - started, ok)
+        if not ok and self.stats[provider].cooling_down and self.stats[provider].streak == FAILURE_STREAK:
+            logger.warning(f"⚠️ AI provider {provider} failing, sidelined for {AI_COOLDOWN:.0f}s")
+
+    async def _attempt(self, provider: str, call: ProviderCall, deadline: float) -> Any:
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(provider, deadline - started), max(0.01, deadline - started))
+        except asyncio.CancelledError:
+            raise  # Lost a hedge race or the caller gave up: says nothing about the provider
+        except BaseException:
+            self.record(provider, started, False)
+            raise
+        self.record(provider, started, True)
+        return result
+
+    async def complete(self, call: ProviderCall, budget: float, hedge_after: Optional[float] = None) -> Tuple[str, Any]:
+        """
+        Run `call` on the best provider within `budget` seconds; returns (provider, result).
+        On an error the next provider is tried with what is left of the budget. With `hedge_after`,
+        a still-running first attempt gets a parallel attempt on the next provider after that many
+        seconds, and whichever succeeds first wins.
+        """
+        deadline = time.monotonic() + budget
+        providers = self.ranked()
+        errors: Dict[str, BaseException] = {}
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while providers or running:
+                if providers and not running:
+                    if time.monotonic() >= deadline:
+                        break  # Budget spent: don't charge the next provider with a certain timeout
+                    if errors:
+                        self.failovers += 1
+                    name = providers.pop(0)
+                    running[asyncio.ensure_future(self._attempt(name, call, deadline))] = name
+                wait = None
+                if providers and hedge_after is not None and len(running) == 1:
+                    wait = max(0.0, hedge_after - (budget - (deadline - time.monotonic())))
+                done, _ = await asyncio.wait(running, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Hedge: the first attempt is slow, race the next provider against it
+                    self.hedged += 1
+                    name = providers.pop(0)
+                    logger.info(f"🏁 Hedging slow AI call with {name}")
+                    running[asyncio.ensure_future(self._attempt(name, call, deadline))] = name
+                    continue
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        return name, task.result()
+                    errors[name] = task.exception()
+                    logger.warning(f"⚠️ AI provider {name} failed: {task.exception()!r}")
+            raise AllProvidersFailed(errors)
+        finally:
+            for task in running:
+                task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "ranking": self.ranked(),
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            **{
+                name: {
+                    "calls": len(s.calls),
+                    "error_rate": round(s.error_rate, 3),
+                    "avg_latency_ms": round(1000 * s.latency),
+                    "cooling_down": s.cooling_down,
+                }
+                for name, s in self.stats.items()
+            },
+        }
@@ -0,0 +1,241 @@
+"""
+Compact Attendance Store
+Keeps the full attendance history in typed array columns instead of one dict per row
+"""
+
+from array import array
+import datetime
+import zlib
+from typing import Dict, List, Optional, Any, Tuple
+
+
+def _crc(value: Any) -> int:
+    return zlib.crc32(str(value).strip().encode("utf-8"))
+
+
+class AttendanceStore:
+    """
+    Column-oriented attendance history.
+    Each row costs ~28 bytes: an interned user index plus check-in/check-out epoch seconds, and per
+    sheet row its store row and a checksum of its Check-Out cell (to spot check-outs made later).
+    A published store is never modified: writers edit a `copy()` and publish that.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._capacity = max(1, capacity)
+        self._user_idx = array("I", [0]) * self._capacity
+        self._checkin = array("q", [0]) * self._capacity
+        self._checkout = array("q", [0]) * self._capacity  # 0 = still checked in
+
+        # Interned user IDs (row columns only hold the small integer index)
+        self._user_ids: List[str] = []
+        self._user_lookup: Dict[str, int] = {}
+
+        # Latest open session (row, session ID) per user index - only a handful at any time
+        self._open: Dict[int, int] = {}
+        self._open_ids: Dict[int, str] = {}
+
+        # Midnight epoch per "YYYY-MM-DD" string (a few hundred distinct dates at most)
+        self._date_cache: Dict[str, int] = {}
+
+        # Sheet bookkeeping for tail loads: header, data rows read so far, and locally
+        # appended sessions whose sheet row has not been read back yet
+        self.header: List[str] = []
+        self.sheet_rows = 0
+        self._local_ids: Dict[str, int] = {}
+        self._sheet_map = array("i")  # Sheet data row -> store row (-1: not a session)
+        self._out_crc = array("I")    # Sheet data row -> crc32 of its Check-Out cell as last read
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the array columns (excluding the interned ID table)."""
+        cols = (self._user_idx, self._checkin, self._checkout, self._sheet_map, self._out_crc)
+        return sum(col.itemsize * len(col) for col in cols)
+
+    # --- Building ---
+    def copy(self) -> "AttendanceStore":
+        """An independent copy to edit and publish (the arrays are copied with one memcpy each)."""
+        other = AttendanceStore.__new__(AttendanceStore)
+        other.__dict__.update(self.__dict__)
+        for name in ("_user_idx", "_checkin", "_checkout", "_sheet_map", "_out_crc"):
+            setattr(other, name, getattr(self, name)[:])
+        for name in ("_user_lookup", "_open", "_open_ids", "_date_cache", "_local_ids"):
+            setattr(other, name, getattr(self, name).copy())
+        other._user_ids = list(self._user_ids)
+        other.header = list(self.header)
+        return other
+
+    @classmethod
+    def from_values(cls, values: List[List[Any]]) -> "AttendanceStore":
+        """Build a store from raw `get_all_values()` output (header row first)."""
+        store = cls(capacity=max(1024, len(values)))
+        if values:
+            store.header = list(values[0])
+            store.extend_rows(values[1:])
+        return store
+
+    def extend_rows(self, rows: List[List[Any]]) -> int:
+        """Append sheet data rows read after `sheet_rows` (a tail load); returns sessions added."""
+        self.sheet_rows += len(rows)
+        header = self.header
+        try:
+            uid_col = header.index("User ID")
+            date_col = header.index("Date")
+            in_col = header.index("Check-In Time")
+        except ValueError:
+            return 0
+        out_col = header.index("Check-Out Time") if "Check-Out Time" in header else -1
+        sid_col = header.index("Session ID") if "Session ID" in header else -1
+
+        added = 0
+        for row in rows:
+            out = row[out_col] if 0 <= out_col < len(row) else ""
+            self._out_crc.append(_crc(out))
+            self._sheet_map.append(-1)
+            if len(row) <= max(uid_col, date_col, in_col):
+                continue
+            session_id = row[sid_col] if sid_col != -1 else ""
+            local_row = self._local_ids.pop(session_id, None) if session_id else None
+            if local_row is not None:
+                self._sheet_map[-1] = local_row
+                continue  # Our own check-in, already appended when it happened
+            checkin = self.to_epoch(row[date_col], row[in_col])
+            if checkin is None:
+                continue  # Legacy/misaligned rows (e.g. old workout logs)
+            checkout = (self.to_epoch(row[date_col], out) or 0) if out else 0
+            self._sheet_map[-1] = self.append(row[uid_col], checkin, checkout, session_id)
+            added += 1
+        return added
+
+    def changed_checkouts(self, column: List[List[Any]]) -> List[Tuple[int, str]]:
+        """
+        (sheet data row, new value) for rows already read whose Check-Out cell differs from `column`,
+        the raw `get_values()` of that column over those rows.
+        """
+        changed = []
+        for i in range(self.sheet_rows):
+            cell = column[i] if i < len(column) else []
+            value = str(cell[0]) if cell else ""
+            if _crc(value) != self._out_crc[i]:
+                changed.append((i, value))
+        return changed
+
+    def set_checkout(self, sheet_row: int, value: str) -> bool:
+        """Apply a Check-Out cell edited in the sheet; False if that row is not a session we hold."""
+        row = self._sheet_map[sheet_row]
+        if row < 0:
+            return False
+        self._out_crc[sheet_row] = _crc(value)
+        idx = self._user_idx[row]
+        checkout = 0
+        if value:
+            day = datetime.datetime.fromtimestamp(self._checkin[row]).strftime("%Y-%m-%d")
+            checkout = self.to_epoch(day, value) or 0
+        self._checkout[row] = checkout
+        if checkout and self._open.get(idx) == row:
+            self._open.pop(idx)
+            self._open_ids.pop(idx, None)
+        return True
+
+    def intern(self, user_id: Any) -> int:
+        """Return the compact index for a user ID, assigning one if new."""
+        key = str(user_id).strip()
+        idx = self._user_lookup.get(key)
+        if idx is None:
+            idx = len(self._user_ids)
+            self._user_ids.append(key)
+            self._user_lookup[key] = idx
+        return idx
+
+    def append(self, user_id: Any, checkin_ts: int, checkout_ts: int = 0, session_id: str = "",
+               local: bool = False) -> int:
+        """Append one session and return its row number. local=True: also expected back from a tail load."""
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        idx = self.intern(user_id)
+        self._user_idx[row] = idx
+        self._checkin[row] = int(checkin_ts)
+        self._checkout[row] = int(checkout_ts)
+        self._size += 1
+
+        if not checkout_ts:
+            self._open[idx] = row
+            self._open_ids[idx] = session_id
+        if local and session_id:
+            self._local_ids[session_id] = row
+        return row
+
+    def close_session(self, user_id: Any, checkout_ts: int) -> bool:
+        """Set the check-out time on the user's latest open session."""
+        idx = self._user_lookup.get(str(user_id).strip())
+        if idx is None or idx not in self._open:
+            return False
+        row = self._open.pop(idx)
+        self._open_ids.pop(idx, None)
+        self._checkout[row] = int(checkout_ts)
+        return True
+
+    def open_session(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Latest open session for a user in Attendance-sheet shape, or None."""
+        idx = self._user_lookup.get(str(user_id).strip())
+        if idx is None or idx not in self._open:
+            return None
+        checkin = datetime.datetime.fromtimestamp(self._checkin[self._open[idx]])
+        return {
+            "Session ID": self._open_ids.get(idx, ""),
+            "User ID": self._user_ids[idx],
+            "Date": checkin.strftime("%Y-%m-%d"),
+            "Check-In Time": checkin.strftime("%H:%M:%S"),
+            "Check-Out Time": "",
+        }
+
+    def _grow(self) -> None:
+        """Double capacity of every column."""
+        extra = self._capacity
+        self._user_idx.extend(array("I", [0]) * extra)
+        self._checkin.extend(array("q", [0]) * extra)
+        self._checkout.extend(array("q", [0]) * extra)
+        self._capacity += extra
+
+    def to_epoch(self, date_str: Any, time_str: Any) -> Optional[int]:
+        """Convert 'YYYY-MM-DD' + 'HH:MM[:SS]' to local epoch seconds, or None if invalid."""
+        date_str = str(date_str).strip()
+        base = self._date_cache.get(date_str)
+        if base is None:
+            try:
+                base = int(datetime.datetime.strptime(date_str, "%Y-%m-%d").timestamp())
+            except ValueError:
+                return None
+            self._date_cache[date_str] = base
+        parts = str(time_str).strip().split(":")
+        try:
+            h = int(parts[0])
+            m = int(parts[1]) if len(parts) > 1 else 0
+            s = int(parts[2]) if len(parts) > 2 else 0
+        except ValueError:
+            return None
+        return base + h * 3600 + m * 60 + s
+
+    # --- Queries ---
+    def visit_counts(self) -> Dict[str, int]:
+        """Number of sessions per user ID over the full history."""
+        counts = [0] * len(self._user_ids)
+        user_idx = self._user_idx
+        for row in range(self._size):
+            counts[user_idx[row]] += 1
+        return {uid: c for uid, c in zip(self._user_ids, counts) if c}
+
+    def last_seen(self) -> Dict[str, int]:
+        """Latest check-in epoch per user ID."""
+        latest = [0] * len(self._user_ids)
+        user_idx, checkin = self._user_idx, self._checkin
+        for row in range(self._size):
+            idx = user_idx[row]
+            if checkin[row] > latest[idx]:
+                latest[idx] = checkin[row]
+        return {uid: ts for uid, ts in zip(self._user_ids, latest) if ts}
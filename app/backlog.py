@@ -0,0 +1,114 @@
+"""
+Startup Backlog Drain
+After downtime, collapses repeated button presses and drops stale menu navigation before processing
+"""
+
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from telegram import Update
+from telegram.error import TelegramError
+
+from app.ui import BUTTON_TO_INTENT
+
+logger = logging.getLogger(__name__)
+
+BACKLOG_MAX_AGE = float(os.getenv("BACKLOG_MAX_AGE", "120"))  # Seconds before a menu tap is not worth replaying
+BACKLOG_GRACE = 30.0  # Undated updates (callback queries) count as backlog only this long after startup
+
+# Buttons that only move between keyboards; replaying them after downtime just flickers menus
+NAVIGATION_INTENTS = {
+    intent for intent in BUTTON_TO_INTENT.values()
+    if intent.endswith("_menu") or intent in ("back", "admin_dash", "admin_member_mode", "admin_dash_return")
+}
+
+
+class BacklogFilter:
+    """
+    Decides which updates queued before `started_at` are still worth handling.
+    Updates that arrive after startup always pass.
+    """
+
+    def __init__(self, started_at: Optional[float] = None, max_age: float = BACKLOG_MAX_AGE):
+        self.started_at = started_at if started_at is not None else time.time()
+        self.max_age = max_age
+        self._last_press: Dict[int, Tuple[str, str]] = {}
+        self.kept = 0
+        self.stale = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _press(update: Update) -> Optional[Tuple[str, str]]:
+        """(kind, payload) for a button press, None for anything else (free text, commands, joins...)."""
+        if update.callback_query and update.callback_query.data:
+            return "callback", update.callback_query.data
+        msg = update.message
+        if msg and msg.text in BUTTON_TO_INTENT:
+            return "button", msg.text
+        return None
+
+    def keep(self, update: Update) -> bool:
+        msg = update.message or update.edited_message
+        sent = msg.date.timestamp() if msg and msg.date else None
+        if sent is not None and sent >= self.started_at:
+            return True
+        # Callback queries carry no press time: treat them as backlog only right after startup
+        if sent is None and time.time() > self.started_at + BACKLOG_GRACE:
+            return True
+
+        press = self._press(update)
+        user = update.effective_user
+        if press and user:
+            if press[0] == "button" and BUTTON_TO_INTENT[press[1]] in NAVIGATION_INTENTS \
+                    and sent is not None and time.time() - sent > self.max_age:
+                self.stale += 1
+                return False
+            if self._last_press.get(user.id) == press:
+                self.coalesced += 1
+                return False
+            self._last_press[user.id] = press
+        elif user:
+            self._last_press.pop(user.id, None)  # Anything else in between ends a run of repeats
+        self.kept += 1
+        return True
+
+    def filter(self, updates: List[Update]) -> List[Update]:
+        return [u for u in updates if self.keep(u)]
+
+    def summary(self) -> str:
+        return f"{self.kept} kept, {self.coalesced} repeated presses collapsed, {self.stale} stale menu taps dropped"
+
+
+async def drain_backlog(application) -> int:
+    """
+    Polling mode: fetch everything Telegram queued while the bot was down, acknowledge it, and hand
+    only the meaningful updates to the application's queue. Returns how many were queued.
+    """
+    bot = application.bot
+    pending: List[Update] = []
+    offset = None
+    try:
+        await bot.delete_webhook()
+        while True:
+            batch = await bot.get_updates(offset=offset, timeout=0, limit=100)
+            if not batch:
+                break
+            pending.extend(batch)
+            offset = batch[-1].update_id + 1  # Also acknowledges the batch
+    except TelegramError as e:
+        logger.warning(f"⚠️ Backlog drain skipped: {e}")
+        for update in pending:
+            await application.update_queue.put(update)
+        return len(pending)
+
+    if not pending:
+        return 0
+    backlog = BacklogFilter()
+    kept = backlog.filter(pending)
+    for update in kept:
+        await application.update_queue.put(update)
+    logger.info(f"📦 Startup backlog of {len(pending)} updates: {backlog.summary()}")
+    print(f"📦 Catching up on {len(kept)} of {len(pending)} queued updates")
+    return len(kept)
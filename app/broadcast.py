@@ -0,0 +1,208 @@
+"""
+Broadcast Engine
+Sends one message to many members concurrently as bulk traffic, with resumable job state
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from telegram import Bot, Message
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from app.outbound import BULK_SEND
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_DIR = os.getenv("BROADCAST_STATE_DIR", "broadcast_jobs")
+CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "8"))  # Pacing itself is up to the bot's rate limiter
+MAX_ATTEMPTS = 4
+PROGRESS_INTERVAL = 3.0  # Seconds between status-message edits
+
+# Running broadcasts. Application.create_task only keeps tasks while the app is running (never, in
+# webhook mode), and the loop holds tasks weakly, so an unreferenced job could be collected mid-run
+_running: Set[asyncio.Task] = set()
+
+
+class BroadcastJob:
+    """
+    One broadcast and its progress, persisted as JSON lines: a header, then one line per finished chat.
+    Chats already logged as sent are skipped on resume, so nobody is messaged twice.
+    """
+
+    def __init__(self, job_id: str, text: str, targets: List[str], title: str,
+                 status_chat_id: Optional[int] = None, status_message_id: Optional[int] = None,
+                 parse_mode: Optional[str] = "Markdown"):
+        self.id = job_id
+        self.text = text
+        self.targets = targets
+        self.title = title
+        self.status_chat_id = status_chat_id
+        self.status_message_id = status_message_id
+        self.parse_mode = parse_mode
+        self.sent: set = set()
+        self.failed: Dict[str, str] = {}
+        self._log = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(BROADCAST_DIR, f"{self.id}.jsonl")
+
+    @property
+    def remaining(self) -> List[str]:
+        return [t for t in self.targets if t not in self.sent and t not in self.failed]
+
+    @classmethod
+    def create(cls, targets: Iterable[Any], text: str, title: str, status_message: Optional[Message] = None,
+               parse_mode: Optional[str] = "Markdown") -> "BroadcastJob":
+        # Deduplicated so each chat gets one message (also keeps us within the per-chat limit)
+        unique = list(dict.fromkeys(str(t).strip() for t in targets if str(t).strip()))
+        job = cls(
+            uuid.uuid4().hex[:12], text, unique, title,
+            status_message.chat_id if status_message else None,
+            status_message.message_id if status_message else None,
+            parse_mode,
+        )
+        os.makedirs(BROADCAST_DIR, exist_ok=True)
+        job._append({"job": {
+            "id": job.id, "text": text, "targets": unique, "title": title, "parse_mode": parse_mode,
+            "status_chat_id": job.status_chat_id, "status_message_id": job.status_message_id,
+        }})
+        return job
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BroadcastJob"]:
+        job = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from a crash
+                if "job" in entry:
+                    meta = entry["job"]
+                    job = cls(meta["id"], meta["text"], meta["targets"], meta["title"],
+                              meta.get("status_chat_id"), meta.get("status_message_id"), meta.get("parse_mode"))
+                elif job and "sent" in entry:
+                    job.sent.add(entry["sent"])
+                elif job and "failed" in entry:
+                    job.failed[entry["failed"]] = entry.get("error", "")
+        return job
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if self._log is None:
+            self._log = open(self.path, "a", encoding="utf-8")
+        self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    def mark_sent(self, chat_id: str) -> None:
+        self.sent.add(chat_id)
+        self._append({"sent": chat_id})
+
+    def mark_failed(self, chat_id: str, error: str) -> None:
+        self.failed[chat_id] = error
+        self._append({"failed": chat_id, "error": error})
+
+    def finish(self) -> None:
+        if self._log:
+            self._log.close()
+            self._log = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def progress_text(self, done: bool = False) -> str:
+        total = len(self.targets)
+        if done:
+            return (f"✅ *{self.title}*\n\n📈 Results:\n"
+                    f"• Sent: {len(self.sent)}/{total}\n• Failed: {len(self.failed)}")
+        return f"📤 Sending... {len(self.sent) + len(self.failed)}/{total} ({len(self.failed)} failed)"
+
+
+async def _send_one(bot: Bot, job: BroadcastJob, chat_id: str, sem: asyncio.Semaphore) -> None:
+    async with sem:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await bot.send_message(chat_id=chat_id, text=job.text, parse_mode=job.parse_mode,
+                                       rate_limit_args=BULK_SEND)
+                job.mark_sent(chat_id)
+                return
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else float(e.retry_after)
+                logger.warning(f"⏳ Flood control persisted: broadcast {job.id} waiting {delay}s")
+                await asyncio.sleep(delay)
+            except (Forbidden, BadRequest) as e:
+                # Blocked the bot, chat not found, bad markup: retrying won't help
+                job.mark_failed(chat_id, str(e))
+                return
+            except NetworkError:  # Includes TimedOut
+                if attempt == MAX_ATTEMPTS:
+                    break
+                await asyncio.sleep(2 ** attempt)
+            except TelegramError as e:
+                job.mark_failed(chat_id, str(e))
+                return
+        job.mark_failed(chat_id, "gave up after retries")
+        logger.error(f"Failed to broadcast to {chat_id} after {MAX_ATTEMPTS} attempts")
+
+
+async def _edit_status(bot: Bot, job: BroadcastJob, text: str) -> None:
+    if not job.status_chat_id:
+        return
+    try:
+        await bot.edit_message_text(text, chat_id=job.status_chat_id, message_id=job.status_message_id,
+                                    parse_mode="Markdown")
+    except TelegramError as e:
+        if "not modified" not in str(e).lower():
+            logger.warning(f"Broadcast status edit failed: {e}")
+
+
+async def run_broadcast(bot: Bot, job: BroadcastJob) -> BroadcastJob:
+    """Send to every remaining target; edits the status message with progress along the way."""
+    sem = asyncio.Semaphore(CONCURRENCY)
+    sends = asyncio.gather(*(_send_one(bot, job, chat_id, sem) for chat_id in job.remaining))
+    while True:
+        try:
+            await asyncio.wait_for(asyncio.shield(sends), timeout=PROGRESS_INTERVAL)
+            break
+        except asyncio.TimeoutError:
+            await _edit_status(bot, job, job.progress_text())
+    await _edit_status(bot, job, job.progress_text(done=True))
+    logger.info(f"📢 Broadcast {job.id} finished: {len(job.sent)} sent, {len(job.failed)} failed")
+    job.finish()
+    return job
+
+
+def _spawn(bot: Bot, job: BroadcastJob) -> asyncio.Task:
+    """Run a job in the background, holding on to its task until it finishes."""
+    task = asyncio.create_task(run_broadcast(bot, job), name=f"broadcast-{job.id}")
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return task
+
+
+def start_broadcast(application, targets: Iterable[Any], text: str, title: str,
+                    status_message: Optional[Message] = None, parse_mode: Optional[str] = "Markdown") -> BroadcastJob:
+    """Create a job and run it in the background so the handler (and other updates) are not blocked."""
+    job = BroadcastJob.create(targets, text, title, status_message, parse_mode)
+    _spawn(application.bot, job)
+    return job
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """Finish broadcasts interrupted by a restart (call once at startup)."""
+    if not os.path.isdir(BROADCAST_DIR):
+        return
+    for name in sorted(os.listdir(BROADCAST_DIR)):
+        if not name.endswith(".jsonl"):
+            continue
+        job = BroadcastJob.load(os.path.join(BROADCAST_DIR, name))
+        if job is None:
+            continue
+        logger.warning(f"🔁 Resuming broadcast {job.id}: {len(job.remaining)} of {len(job.targets)} left")
+        _spawn(bot, job)
@@ -0,0 +1,84 @@
+"""
+Circuit Breaker
+Stops calling a failing backend after repeated errors and lets a single trial call through after a cooldown
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit is open."""
+
+
+class CircuitBreaker:
+    """Classic closed -> open -> half-open breaker, safe to share between threads."""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 is_failure: Optional[Callable[[Exception], bool]] = None):
+        self.name = name
+        self.is_failure = is_failure or (lambda e: True)  # Which errors mean the backend is unhealthy
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if time.time() - self.opened_at >= self.reset_timeout:
+                # Let exactly one trial call through. A trial whose outcome is never recorded
+                # doesn't wedge the breaker: another one is allowed after the next timeout.
+                self.state = HALF_OPEN
+                self.opened_at = time.time()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"✅ Circuit '{self.name}' closed - backend healthy again")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"⚠️ Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.time()
+
+    def record_error(self, e: Exception) -> None:
+        """Any error ends a half-open trial; only `is_failure` errors count towards opening from closed."""
+        if self.is_failure(e) or self.state == HALF_OPEN:
+            self.record_failure()
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError when refused."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_error(e)
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,112 @@
+"""
+Dataset Registry
+Worksheet-backed cache slices that load on first use, each with its own TTL and refresh strategy
+"""
+
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FULL = "full"  # Refetch everything each time
+TAIL = "tail"  # Fetch only rows appended since the last load; full reload every `full_ttl`
+DIFF = "diff"  # Refetch everything but apply only what changed
+
+# load(full) -> truthy if the data changed (the value is passed on to on_change hooks).
+# full=True: reload from scratch (first load, after invalidate(), or a tail dataset's periodic reload)
+Loader = Callable[[bool], Any]
+Hook = Callable[["Dataset", Any], None]
+
+
+class Dataset:
+    """One slice of the cache (e.g. Members) and when it was last loaded."""
+
+    def __init__(self, name: str, load: Loader, ttl: float, strategy: str = FULL, full_ttl: Optional[float] = None):
+        self.name = name
+        self.load = load
+        self.ttl = ttl
+        self.strategy = strategy
+        self.full_ttl = full_ttl if full_ttl is not None else ttl
+        self.loaded_at = 0.0
+        self.full_loaded_at = 0.0
+        self.version = 0  # Bumped whenever a load reports a change
+        self.hooks: List[Hook] = []
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    def is_fresh(self, now: float) -> bool:
+        return self.loaded and now - self.loaded_at < self.ttl
+
+    def invalidate(self) -> None:
+        """Force a full reload on next use."""
+        self.loaded_at = 0.0
+        self.full_loaded_at = 0.0
+
+
+class DatasetRegistry:
+    """Named datasets; `ensure()` loads whichever of them are missing or past their TTL."""
+
+    def __init__(self):
+        self._datasets: Dict[str, Dataset] = {}
+
+    def register(self, name: str, load: Loader, ttl: float, strategy: str = FULL,
+                 full_ttl: Optional[float] = None) -> Dataset:
+        ds = Dataset(name, load, ttl, strategy, full_ttl)
+        self._datasets[name] = ds
+        return ds
+
+    def __getitem__(self, name: str) -> Dataset:
+        return self._datasets[name]
+
+    def names(self) -> List[str]:
+        return list(self._datasets)
+
+    def on_change(self, name: str, hook: Hook) -> None:
+        """Call hook(dataset, changed) after a load of `name` reports a change."""
+        self._datasets[name].hooks.append(hook)
+
+    def invalidate(self, *names: str) -> None:
+        """Mark datasets for reload on next use (all of them if no names given)."""
+        for name in names or self._datasets:
+            self._datasets[name].invalidate()
+
+    def ensure(self, *names: str, force: bool = False) -> None:
+        """Load the named datasets if never loaded or expired (force: regardless of TTL). Raises on load failure."""
+        for name in names:
+            ds = self._datasets[name]
+            if not force and ds.is_fresh(time.time()):
+                continue
+            with ds.lock:
+                now = time.time()
+                if not force and ds.is_fresh(now):
+                    continue  # Another thread loaded it while we waited
+                full = not ds.loaded or (ds.strategy == TAIL and now - ds.full_loaded_at >= ds.full_ttl)
+                changed = ds.load(full)
+                ds.loaded_at = now
+                if full:
+                    ds.full_loaded_at = now
+                if changed:
+                    ds.version += 1
+                    for hook in ds.hooks:
+                        try:
+                            hook(ds, changed)
+                        except Exception as e:
+                            logger.error(f"❌ on_change hook for '{name}' failed: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Age, TTL and version per dataset (for health output)."""
+        now = time.time()
+        return {
+            name: {
+                "strategy": ds.strategy,
+                "ttl": ds.ttl,
+                "age": round(now - ds.loaded_at, 1) if ds.loaded else None,
+                "version": ds.version,
+            }
+            for name, ds in self._datasets.items()
+        }
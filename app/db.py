@@ -3,11 +3,41 @@ import json
 import datetime
 import time
 from typing import Optional, Dict, List, Any
+import threading
 import gspread
+import requests
 import logging
+from google.auth import exceptions as google_auth_errors
+
+from app import request_cache
+from app.attendance_store import AttendanceStore
+from app.circuit import CircuitBreaker, CircuitOpenError
+from app.datasets import DatasetRegistry, DIFF, TAIL
+from app.journal import WriteJournal
+from app.snapshot import CacheSnapshot, empty_snapshot
+from app.sheet_changes import SheetChangeTracker, values_to_records
 
 logger = logging.getLogger(__name__)
 
+# Rarely-edited worksheets: probed together in one batch call, reparsed only when their content changes
+INFO_SHEETS = ["General_Settings", "Fees_Structure", "Trainers", "Knowledge_Base", "FAQ"]
+CONFIG_SHEETS = INFO_SHEETS + ["Classes", "Machines"]
+ATTENDANCE_HEADERS = ["Session ID", "User ID", "Full Name", "Date", "Check-In Time", "Check-Out Time", "Duration (mins)", "Notes"]
+
+
+class SheetsUnavailableError(Exception):
+    """No Sheets client (init failed) or the worksheet was never opened."""
+
+
+def is_transient_error(e: Exception) -> bool:
+    """Errors worth retrying later (outage, timeout, rate limit, auth hiccup) rather than failing the write."""
+    if isinstance(e, (CircuitOpenError, SheetsUnavailableError, requests.exceptions.RequestException,
+                      google_auth_errors.TransportError, google_auth_errors.RefreshError)):
+        return True
+    if isinstance(e, gspread.exceptions.APIError):
+        return e.code == 429 or e.code >= 500
+    return False
+
 class DatabaseManager:
     """
     Manages gym data storage using Google Sheets as the primary database.
@@ -16,7 +46,10 @@ class DatabaseManager:
 
     def __init__(self):
         """Initialize the manager and load initial data from Sheets."""
-        self.data: Dict[str, Any] = {"members": [], "workouts": [], "classes": []}
+        # Readers take `self.snapshot` once and use only that; writers build a new one and swap it in
+        self._snapshot: CacheSnapshot = empty_snapshot()
+        self._publish_lock = threading.Lock()
+        self._attendance_lock = threading.Lock()  # Serializes copy-on-write edits of the attendance store
         self.spreadsheet = None
         self.members_sheet = None
         self.payment_history_sheet = None
@@ -29,19 +62,49 @@ class DatabaseManager:
         self.kb_sheet = None
         self.faq_sheet = None
         self.machines_sheet = None
+        self._worksheets: Dict[str, Any] = {}
+        
+        # Sheets resilience: fail fast while Sheets is down, serve stale reads, journal writes
+        self.breaker = CircuitBreaker(
+            "sheets",
+            failure_threshold=int(os.getenv("SHEETS_FAILURE_THRESHOLD", "3")),
+            reset_timeout=float(os.getenv("SHEETS_RETRY_AFTER", "30")),
+            is_failure=is_transient_error,  # A bad range or missing row says nothing about Sheets' health
+        )
+        self.stale_since: Optional[float] = None
+        self._last_good: Dict[str, List[Dict[str, Any]]] = {}
+        self._probe_thread: Optional[threading.Thread] = None
         
-        # Cache management
-        self._last_data_refresh = 0
-        self._refresh_interval = 300 # Refresh data cache every 5 minutes
-        self._last_info_refresh = 0
+        # Every mutation is journaled to local disk before it is sent, and replayed until confirmed
+        self.journal = WriteJournal(os.getenv("WRITE_JOURNAL_PATH", "write_journal.jsonl"))
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._flusher_thread: Optional[threading.Thread] = None
+        
+        # Cache management: each dataset loads on first use and expires on its own TTL
+        self.datasets = DatasetRegistry()
+        self.datasets.register("members", self._load_members,
+                               ttl=float(os.getenv("MEMBERS_CACHE_TTL", "120")), strategy=DIFF)
+        self.datasets.register("attendance", self._load_attendance,
+                               ttl=float(os.getenv("ATTENDANCE_CACHE_TTL", "60")), strategy=TAIL,
+                               full_ttl=float(os.getenv("ATTENDANCE_FULL_RELOAD", "900")))
+        self.datasets.register("config", self._load_config,
+                               ttl=float(os.getenv("CONFIG_CACHE_TTL", "900")), strategy=DIFF)
+        self.datasets.on_change("members", lambda ds, diff: request_cache.invalidate("member"))
+        self.datasets.on_change("config", self._on_config_change)
         self._info_cache = {}
+        self._config_records: Dict[str, List[Dict[str, Any]]] = {}
+        self._config_tracker = SheetChangeTracker()
         
         self.use_sheets = os.getenv("ENABLE_SHEETS", "true").lower() == "true"
         
         if self.use_sheets:
             self._init_sheets_oauth()
-            # Initial full load
-            self.refresh_cache(force=True)
+            # Land anything a previous run journaled but never confirmed (datasets load lazily on first use)
+            if self.spreadsheet:
+                self._flush_journal()
+            elif len(self.journal):
+                logger.warning(f"📒 No Sheets client: keeping {len(self.journal)} journaled writes for the next run")
 
     def _init_sheets_oauth(self) -> None:
         """Initialize Google Sheets connection."""
@@ -92,6 +155,7 @@ class DatabaseManager:
 
             if not gc:
                 raise Exception("Failed to initialize Google Sheets client (no valid credentials)")
+            gc.set_timeout(float(os.getenv("SHEETS_TIMEOUT", "10")))
 
             sheet_name = os.getenv("GOOGLE_SHEET_NAME", "GymAutomationDB")
             self.spreadsheet = gc.open(sheet_name)
@@ -120,53 +184,365 @@ class DatabaseManager:
     def _get_or_create_sheet(self, name: str):
         """Get worksheet or create if missing."""
         try:
-            return self.spreadsheet.worksheet(name)
+            sheet = self.spreadsheet.worksheet(name)
+            self._worksheets[name] = sheet
+            return sheet
         except gspread.exceptions.WorksheetNotFound:
             headers = {
                 "Members": ["User ID", "Full Name", "Phone", "Address", "Occupation", "Plan", "Membership Type", "Duration (Months)", "Amount Paid", "Status", "Join Date", "Expiry Date", "Last Renewal"],
                 "Payment_History": ["Transaction ID", "User ID", "Full Name", "Date", "Action", "Plan", "Duration (Months)", "Amount", "Expiry Date", "Payment Method", "Due Date", "Due Amount"],
-                "Attendance": ["Session ID", "User ID", "Full Name", "Date", "Check-In Time", "Check-Out Time", "Duration (mins)", "Notes"],
+                "Attendance": ATTENDANCE_HEADERS,
                 "Classes": ["Class ID", "Class Name", "Day", "Time", "Duration", "Instructor", "Max Capacity", "Current Enrolled", "Availability", "Active"],
                 "Machines": ["Machine Name", "Muscles Trained", "Description", "Active"]
             }
             sheet = self.spreadsheet.add_worksheet(title=name, rows=2000, cols=20)
             if name in headers:
                 sheet.update(values=[headers[name]], range_name="A1")
+            self._worksheets[name] = sheet
             return sheet
 
-    def refresh_cache(self, force: bool = False) -> None:
-        """Refresh local memory cache from Sheets."""
-        now = time.time()
-        if not force and (now - self._last_data_refresh < self._refresh_interval):
+    # --- Sheets Resilience ---
+    @property
+    def is_stale(self) -> bool:
+        """True while reads are being served from cached data because Sheets is unavailable."""
+        return self.stale_since is not None
+
+    def _mark_stale(self) -> None:
+        if self.stale_since is None:
+            self.stale_since = time.time()
+            logger.warning("⚠️ Google Sheets unavailable - serving cached data")
+        self._start_health_probe()
+
+    def _read_records(self, key: str, sheet) -> List[Dict[str, Any]]:
+        """get_all_records() through the circuit breaker, falling back to the last good copy."""
+        try:
+            records = self.breaker.call(sheet.get_all_records)
+        except Exception as e:
+            if not is_transient_error(e) or key not in self._last_good:
+                raise
+            self._mark_stale()
+            return self._last_good[key]
+        self._last_good[key] = records
+        return records
+
+    def _write(self, op: str, *args, wait: bool = True) -> bool:
+        """Journal and apply one Sheets mutation (`_apply_<op>`). See `_write_batch`."""
+        return self._write_batch([(op, args)], wait=wait)
+
+    def _write_batch(self, ops: List[tuple], wait: bool = True) -> bool:
+        """
+        Journal mutations as one unit, then send them.
+        wait=False acknowledges at local-disk latency and leaves sending to the background flusher.
+        Returns True if everything reached Sheets now, False if it is still pending in the journal.
+        """
+        ids = self.journal.record(ops)
+        if not wait:
+            self._start_journal_flusher()
+            self._flush_event.set()
+            return False
+        self._flush_journal()
+        return not any(self.journal.is_pending(i) for i in ids)
+
+    def _flush_journal(self) -> bool:
+        """Replay unconfirmed journal entries in order; stops at the first transient failure."""
+        if not self.spreadsheet:
+            return False  # Nothing to send them with: entries stay pending
+        with self._flush_lock:
+            for entry in self.journal.pending():
+                try:
+                    self.breaker.call(self._apply_entry, entry)
+                except Exception as e:
+                    if is_transient_error(e):
+                        if not isinstance(e, CircuitOpenError):
+                            self.journal.mark_attempted(entry["id"])
+                        logger.warning(f"📥 '{entry['op']}' journaled until Sheets recovers ({len(self.journal)} pending): {e}")
+                        self._mark_stale()
+                        return False
+                    logger.error(f"❌ Dropping journaled '{entry['op']}' after permanent error: {e}")
+                self.journal.mark_done(entry["id"])
+            return True
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> None:
+        op, args = entry["op"], entry["args"]
+        # An append that may already have landed (crash or timeout mid-call) is skipped if its key row exists
+        if entry.get("replay") and op == "append" and self._row_exists(args[0], args[1][0]):
+            return
+        getattr(self, f"_apply_{op}")(*args)
+
+    def _row_exists(self, sheet_name: str, key: Any) -> bool:
+        return self._worksheet(sheet_name).find(str(key), in_column=1) is not None
+
+    def _worksheet(self, name: str):
+        """An opened worksheet; a missing one is transient (init failed), so journaled writes wait for it."""
+        sheet = self._worksheets.get(name)
+        if sheet is None:
+            raise SheetsUnavailableError(f"Worksheet '{name}' is not available")
+        return sheet
+
+    def _start_journal_flusher(self) -> None:
+        if self._flusher_thread and self._flusher_thread.is_alive():
+            return
+        self._flusher_thread = threading.Thread(target=self._journal_flusher_loop, name="journal-flush", daemon=True)
+        self._flusher_thread.start()
+
+    def _journal_flusher_loop(self) -> None:
+        """Background: send journaled writes as soon as they are recorded."""
+        while True:
+            self._flush_event.wait()
+            self._flush_event.clear()
+            self._flush_journal()
+
+    def _start_health_probe(self) -> None:
+        if self._probe_thread and self._probe_thread.is_alive():
+            return
+        self._probe_thread = threading.Thread(target=self._health_probe_loop, name="sheets-health", daemon=True)
+        self._probe_thread.start()
+
+    def _health_probe_loop(self) -> None:
+        """Background: poll Sheets until it answers, then replay journaled writes and refresh the cache."""
+        while True:
+            time.sleep(self.breaker.reset_timeout)
+            try:
+                self.breaker.call(self.spreadsheet.fetch_sheet_metadata)
+            except Exception:
+                continue
+            if not self._flush_journal():
+                continue
+            self.stale_since = None
+            self.datasets.invalidate()  # Reload everything from scratch on next use
+            logger.info("✅ Google Sheets reachable again - journaled writes replayed")
+            return
+
+    # --- Sheets Mutations (replayable by name) ---
+    def _apply_append(self, sheet_name: str, row: List[Any]) -> None:
+        self._worksheet(sheet_name).append_row(row)
+
+    def _apply_upsert_member(self, user_id: Any, member_row: List[Any]) -> None:
+        sheet = self._worksheet("Members")
+        cell = sheet.find(str(user_id), in_column=1)
+        if cell:
+            sheet.update(values=[member_row], range_name=f"A{cell.row}:M{cell.row}")
+        else:
+            sheet.append_row(member_row)
+
+    def _apply_checkout(self, session_id: str, checkout_time: str, duration_mins: int) -> None:
+        sheet = self._worksheet("Attendance")
+        cell = sheet.find(session_id)
+        if not cell:
+            logger.error(f"❌ Session {session_id} not found")
+            return
+        # Update Check-Out Time (column F) and Duration (column G)
+        sheet.update_cell(cell.row, 6, checkout_time)
+        sheet.update_cell(cell.row, 7, duration_mins)
+
+    def _apply_member_cell(self, user_id: str, col: int, value: Any) -> None:
+        sheet = self._worksheet("Members")
+        cell = sheet.find(user_id, in_column=1)
+        if cell:
+            sheet.update_cell(cell.row, col, value)
+
+    def _apply_delete_member(self, user_id: str) -> None:
+        sheet = self._worksheet("Members")
+        cell = sheet.find(user_id, in_column=1)
+        if cell:  # Already gone on a replay
+            sheet.delete_rows(cell.row)
+
+    def _apply_clear_member_due(self, user_id: str) -> None:
+        sheet = self._worksheet("Members")
+        cell = sheet.find(user_id, in_column=1)
+        if cell:
+            # Due Date is column N and Due Amount is column O
+            sheet.update(values=[["", "0"]], range_name=f"N{cell.row}:O{cell.row}")
+
+    def _apply_member_dues(self, user_id: str, due_date: str, due_amount: str) -> None:
+        sheet = self._worksheet("Payment_History")
+        user_ids = sheet.col_values(2)  # User ID is column B
+        if user_id not in user_ids:
+            logger.error(f"❌ No payment record found for user {user_id}")
             return
+        row_idx = len(user_ids) - user_ids[::-1].index(user_id)  # Latest payment
+        # Payment_History has duplicate "Due Date" columns (10 and 13); the last ones are 13 and 14
+        sheet.update(values=[[due_date, due_amount]], range_name=f"M{row_idx}:N{row_idx}")
+
+    def _apply_upsert_class(self, class_name: str, time: str, instructor: str, availability: str) -> None:
+        sheet = self._worksheet("Classes")
+        classes = sheet.col_values(2)  # Class Name is Col B
+        if class_name in classes:
+            row_idx = classes.index(class_name) + 1
+            sheet.update(values=[[time, instructor, availability]], range_name=f"D{row_idx}:F{row_idx}")
+        else:
+            sheet.append_row([f"CLS_{len(classes)}", class_name, "Mon-Sat", time, "60m", instructor, 20, 0, availability, True])
+
+    # --- Cache Snapshots ---
+    @property
+    def snapshot(self) -> CacheSnapshot:
+        """The current published cache snapshot (safe to read without locks)."""
+        return self._snapshot
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Legacy dict view of the current snapshot."""
+        return self._snapshot.as_data()
+
+    def _publish(self, **changes) -> CacheSnapshot:
+        """Swap in a new snapshot with the given fields replaced."""
+        with self._publish_lock:
+            self._snapshot = self._snapshot._replace(built_at=time.time(), **changes)
+            return self._snapshot
+
+    def refresh_cache(self, *names: str, force: bool = False) -> None:
+        """
+        Load the named datasets (all if none given) if never loaded or past their TTL.
+        force=True loads now regardless of TTL. Failures keep the last good snapshot.
+        """
+        if not self.spreadsheet:
+            return
+        names = names or tuple(self.datasets.names())
+        now = time.time()
+        due = [n for n in names if force or not self.datasets[n].is_fresh(now)]
+        if due and len(self.journal):
+            # Sheets is behind our journaled writes: reloading now would drop them from the cache
+            due = [n for n in due if not self.datasets[n].loaded]
+        if not due or not self.breaker.allow():
+            return  # Nothing to do, or Sheets is down: keep serving the last good snapshot
 
         try:
-            print("🔄 Refreshing Cache from Google Sheets...")
-            if self.members_sheet:
-                self.data["members"] = self.members_sheet.get_all_records()
-            if self.attendance_sheet:
-                # Load last 1000 logs for performance
-                all_logs = self.attendance_sheet.get_all_records()
-                self.data["workouts"] = all_logs[-1000:]
-            if self.classes_sheet:
-                self.data["classes"] = self.classes_sheet.get_all_records()
-            if self.machines_sheet:
-                self.data["machines"] = self.machines_sheet.get_all_records()
-            
-            self._last_data_refresh = now
-            print(f"✅ Cache Updated. Members: {len(self.data['members'])}")
-            logger.info(f"✅ Cache Updated. Members: {len(self.data['members'])}")
+            self.datasets.ensure(*due, force=force)
+            self.breaker.record_success()
         except Exception as e:
-            print(f"⚠️ Cache Refresh Failed: {e}")
-            logger.error(f"⚠️ Cache Refresh Failed: {e}", exc_info=True)
+            print(f"⚠️ Cache Refresh Failed ({', '.join(due)}): {e}")
+            logger.error(f"⚠️ Cache Refresh Failed ({', '.join(due)}): {e}", exc_info=True)
+            self.breaker.record_error(e)
+            if is_transient_error(e):
+                self._mark_stale()
+
+    # --- Dataset Loaders (see self.datasets) ---
+    def _load_members(self, full: bool) -> Any:
+        """Diff strategy: refetch Members, apply only inserted/updated/deleted rows."""
+        members, diff = self.snapshot.members.sync(self.members_sheet.get_all_records())
+        self._publish(members=members)
+        print(f"👥 Members loaded: {len(members.members)}")
+        if diff:
+            logger.info(f"👥 Members sync: {diff}")
+        return diff
+
+    def _load_attendance(self, full: bool) -> int:
+        """
+        Tail strategy: read rows appended since the last load plus the Check-Out column of the rows
+        already held (check-outs land on old rows), with a periodic full reload.
+        """
+        store = self.snapshot.attendance
+        if full or not store.header:
+            # Full history goes into the compact store; only the recent tail is kept as dicts
+            values = self.attendance_sheet.get_all_values()
+            store = AttendanceStore.from_values(values)
+            workouts = tuple(dict(zip(values[0], row)) for row in values[1:][-1000:]) if values else ()
+            with self._attendance_lock:
+                self._publish(attendance=store, workouts=workouts)
+            print(f"📍 Attendance: {len(store)} sessions ({store.nbytes // 1024} KB)")
+            return len(store) + 1
+
+        checkouts = []
+        if store.sheet_rows and "Check-Out Time" in store.header:
+            out_col = gspread.utils.rowcol_to_a1(1, store.header.index("Check-Out Time") + 1)[:-1]
+            checkouts = self.attendance_sheet.get_values(f"{out_col}2:{out_col}{store.sheet_rows + 1}")
+        first_row = store.sheet_rows + 2  # Sheet rows are 1-indexed and row 1 is the header
+        last_col = gspread.utils.rowcol_to_a1(1, len(store.header))[:-1]
+        try:
+            rows = self.attendance_sheet.get_values(f"A{first_row}:{last_col}")
+        except gspread.exceptions.APIError as e:
+            if e.code != 400:
+                raise
+            rows = []  # Range starts past the end of the grid: nothing new yet
+
+        changed = store.changed_checkouts(checkouts)
+
+        def apply(store: AttendanceStore) -> Optional[int]:
+            if not all(store.set_checkout(i, value) for i, value in changed):
+                return None  # A row we don't hold as a session changed: only a full reload can tell
+            # Every fetched row (blank ones included) advances the tail offset; extend_rows skips the blanks
+            store.extend_rows(rows)
+            return len(changed)
+
+        if not rows and not changed:
+            return 0
+        updated = self._edit_attendance(apply)
+        if updated is None:
+            return self._load_attendance(full=True)
+        rows = [row for row in rows if any(row)]
+        if rows:
+            new_workouts = tuple(dict(zip(store.header, row)) for row in rows)
+            self._publish(workouts=(self.snapshot.workouts + new_workouts)[-1000:])
+        return len(rows) + updated
+
+    def _edit_attendance(self, edit):
+        """Copy-on-write: run edit(store) on a copy of the published store, then publish the copy."""
+        with self._attendance_lock:
+            store = self.snapshot.attendance.copy()
+            result = edit(store)
+            if result is not None:
+                self._publish(attendance=store)
+            return result
+
+    def _load_config(self, full: bool) -> List[str]:
+        """Diff strategy: one batched probe of all config sheets, reparsing only changed ones."""
+        changed = self._sync_config_sheets(force=full)
+        changes = self._config_snapshot_changes(changed)
+        if changes:
+            self._publish(**changes)
+        return changed
+
+    def _on_config_change(self, dataset, changed: List[str]) -> None:
+        if any(name in INFO_SHEETS for name in changed):
+            self._info_cache = {}  # Rebuilt by the next get_gym_info()
+            request_cache.invalidate("gym_info")
+
+    def _sync_config_sheets(self, force: bool = False) -> List[str]:
+        """Reload config worksheets whose content changed since the last probe; returns changed names."""
+        if not self.spreadsheet:
+            return []
+        if force:
+            self._config_tracker.forget()
+
+        # 1. Cheap revision marker: nothing in the spreadsheet changed -> skip the probe entirely
+        try:
+            revision = self.spreadsheet.get_lastUpdateTime()
+        except Exception:
+            revision = None  # Drive metadata unavailable - rely on content fingerprints
+        if self._config_records and self._config_tracker.is_current(revision):
+            return []
+
+        # 2. One batched read for all config sheets, reparse only those whose fingerprint moved
+        response = self.spreadsheet.values_batch_get([f"'{name}'" for name in CONFIG_SHEETS])
+        changed = []
+        for name, value_range in zip(CONFIG_SHEETS, response.get("valueRanges", [])):
+            values = value_range.get("values", [])
+            if self._config_tracker.has_changed(name, values):
+                self._config_records[name] = values_to_records(values)
+                changed.append(name)
+
+        self._config_tracker.mark_revision(revision)
+        if changed:
+            logger.info(f"🧩 Config sheets reloaded: {', '.join(changed)}")
+        return changed
+
+    def _config_snapshot_changes(self, changed: List[str]) -> Dict[str, Any]:
+        """Snapshot fields to replace for the given changed config sheets."""
+        changes = {}
+        if "Classes" in changed:
+            changes["classes"] = tuple(self._config_records["Classes"])
+        if "Machines" in changed:
+            changes["machines"] = tuple(self._config_records["Machines"])
+        return changes
 
     # --- Member Methods ---
     def get_member(self, user_id: Any) -> Optional[Dict[str, Any]]:
-        self.refresh_cache()
-        for m in self.data["members"]:
-            if str(m.get("User ID")) == str(user_id):
-                return m
-        return None
+        uid = str(user_id).strip()
+
+        def lookup():
+            self.refresh_cache("members")
+            return self.snapshot.members.by_id.get(uid)
+        return request_cache.memoize("member", uid, lookup)
 
     def add_member(self, user_id: Any, full_name: str, plan: str, phone: str = "", 
                    status: str = "Active", address: str = "", occupation: str = "", 
@@ -186,55 +562,50 @@ class DatabaseManager:
             amount_paid, status, join_date, expiry_date, join_date  # 13 columns - removed due_date, due_amount
         ]
         
-        # 1. Update Sheets (Member row)
+        # 1. Member row, 2. Payment History - journaled together so a crash cannot leave one without the other
         existing_member = self.get_member(user_id)
         if existing_member:
-            # Optimize: Use memory cache to find row index instead of slow col_values() API call
-            row_idx = -1
-            for i, m in enumerate(self.data.get("members", [])):
-                if str(m.get("User ID")) == str(user_id):
-                    row_idx = i + 2 # +1 for 1-indexing, +1 for headers
-                    break
-            
-            if row_idx != -1:
-                self.members_sheet.update(values=[member_row], range_name=f"A{row_idx}:M{row_idx}")
-            else:
-                self.members_sheet.append_row(member_row)
+            member_op = ("upsert_member", (str(user_id), member_row))
         else:
-            self.members_sheet.append_row(member_row)
+            member_op = ("append", ("Members", member_row))
 
-        # 2. Add to Payment History
         txn_id = f"TXN_{user_id}_{now.strftime('%Y%m%d%H%M')}"
         payment_row = [
             txn_id, str(user_id), full_name, join_date, 
             "Joined" if membership_type == "Regular" else "Trial Booked",
             plan, duration_months, amount_paid, expiry_date, "UPI/Cash", "New Member"
         ]
-        self.payment_history_sheet.append_row(payment_row)
+        self._write_batch([member_op, ("append", ("Payment_History", payment_row))])
         
         # 3. Force refresh cache to include new member
-        self.refresh_cache(force=True)
+        self.refresh_cache("members", force=True)
+        request_cache.invalidate("member", user_id)
         return self.get_member(user_id)
 
     def update_member_status(self, user_id: Any, status: str) -> bool:
-        members = self.members_sheet.col_values(1)
-        try:
-            row_idx = members.index(str(user_id)) + 1
-            self.members_sheet.update_cell(row_idx, 10, status) # Column J is Status
-            self.refresh_cache(force=True)
-            return True
-        except ValueError:
+        if not self.get_member(user_id):
+            return False
+        self._write("member_cell", str(user_id), 10, status)  # Column J is Status
+        self.refresh_cache("members", force=True)
+        request_cache.invalidate("member", user_id)
+        return True
+
+    def update_member_field(self, user_id: Any, col: int, value: Any) -> bool:
+        """Set one cell (1-based column) on the member's row."""
+        if not self.get_member(user_id):
             return False
+        self._write("member_cell", str(user_id), col, value)
+        self.refresh_cache("members", force=True)
+        request_cache.invalidate("member", user_id)
+        return True
 
     def delete_member(self, user_id: Any) -> bool:
-        members = self.members_sheet.col_values(1)
-        try:
-            row_idx = members.index(str(user_id)) + 1
-            self.members_sheet.delete_rows(row_idx)
-            self.refresh_cache(force=True)
-            return True
-        except ValueError:
+        if not self.get_member(user_id):
             return False
+        self._write("delete_member", str(user_id))
+        self.refresh_cache("members", force=True)
+        request_cache.invalidate("member", user_id)
+        return True
 
     # --- Workout/Attendance ---
     def log_workout(self, user_id: Any, workout_type: str, duration: str, notes: str = "") -> Dict[str, Any]:
@@ -247,54 +618,43 @@ class DatabaseManager:
         log_id = f"LOG_{user_id}_{now.strftime('%Y%m%d%H%M')}"
         row = [log_id, date_str, time_str, str(user_id), name, workout_type, duration, notes, True]
         
-        self.attendance_sheet.append_row(row)
-        self.refresh_cache(force=True)
+        self._write("append", "Attendance", row)
+        self.refresh_cache("attendance", force=True)
         return {"Timestamp": f"{date_str} {time_str}", "User ID": user_id, "Workout Type": workout_type}
 
     def get_member_workouts(self, user_id: Any, limit: int = 5) -> List[Dict[str, Any]]:
-        self.refresh_cache()
-        user_workouts = [w for w in self.data["workouts"] if str(w.get("User ID")) == str(user_id)]
+        self.refresh_cache("attendance")
+        user_workouts = [w for w in self.snapshot.workouts if str(w.get("User ID")) == str(user_id)]
         return user_workouts[-limit:][::-1] # Last N, newest first
 
     # --- Classes ---
     def get_classes(self) -> List[Dict[str, Any]]:
-        self.refresh_cache()
-        return self.data.get("classes", [])
+        self.refresh_cache("config")
+        return list(self.snapshot.classes)
 
     def update_class(self, class_name: str, time: str, instructor: str, availability: str) -> bool:
-        classes = self.classes_sheet.col_values(2) # Class Name is Col B
-        try:
-            row_idx = classes.index(class_name) + 1
-            self.classes_sheet.update(values=[[time, instructor, availability]], range_name=f"D{row_idx}:F{row_idx}")
-        except ValueError:
-            new_id = f"CLS_{len(classes)}"
-            self.classes_sheet.append_row([new_id, class_name, "Mon-Sat", time, "60m", instructor, 20, 0, availability, True])
-        
-        self.refresh_cache(force=True)
+        self._write("upsert_class", class_name, time, instructor, availability)
+        self.datasets.invalidate("config")
         return True
 
     # --- Analytics & Reports ---
     def get_all_members(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        self.refresh_cache()
-        m_list = self.data["members"]
+        self.refresh_cache("members")
+        m_list = list(self.snapshot.members.members)
         if status:
             return [m for m in m_list if m.get("Status") == status]
         return m_list
 
     def get_revenue_stats(self) -> Dict[str, Any]:
-        self.refresh_cache()
-        history = self.payment_history_sheet.get_all_records()
+        self.refresh_cache("members")
+        history = self._read_records("payments", self.payment_history_sheet)
         now = datetime.datetime.now()
         current_month = now.strftime("%Y-%m")
         total = 0
         monthly = 0
-        new_members_count = 0
         
         # Count members joined this month
-        for m in self.data["members"]:
-            join_date = m.get("Join Date", "")
-            if join_date.startswith(current_month):
-                new_members_count += 1
+        new_members_count = self.snapshot.members.join_month_counts.get(current_month, 0)
 
         for entry in history:
             amt_str = str(entry.get("Amount", "0")).replace("₹", "").replace(",", "").strip()
@@ -310,22 +670,23 @@ class DatabaseManager:
             "total": total, 
             "monthly": monthly, 
             "month_display": now.strftime("%B %Y"),
-            "new_members": new_members_count
+            "new_members": new_members_count,
+            "stale": self.is_stale
         }
 
     def get_recent_transactions(self, limit: int = 5) -> List[Dict[str, Any]]:
-        history = self.payment_history_sheet.get_all_records()
+        history = self._read_records("payments", self.payment_history_sheet)
         return history[-limit:][::-1]
 
     def get_dues_report(self) -> List[Dict[str, Any]]:
-        self.refresh_cache()
-        return [m for m in self.data["members"] if m.get("Status") == "Pending"]
+        self.refresh_cache("members")
+        return [m for m in self.snapshot.members.members if m.get("Status") == "Pending"]
 
     def get_expiring_soon(self, days: int = 7) -> List[Dict[str, Any]]:
-        self.refresh_cache()
+        self.refresh_cache("members")
         soon = []
         now = datetime.datetime.now()
-        for m in self.data["members"]:
+        for m in self.snapshot.members.members:
             try:
                 exp_str = m.get("Expiry Date")
                 if not exp_str: continue
@@ -339,10 +700,10 @@ class DatabaseManager:
         return soon
 
     def get_expired_members(self) -> List[Dict[str, Any]]:
-        self.refresh_cache()
+        self.refresh_cache("members")
         expired = []
         now = datetime.datetime.now()
-        for m in self.data["members"]:
+        for m in self.snapshot.members.members:
             try:
                 exp_str = m.get("Expiry Date")
                 if not exp_str: continue
@@ -356,22 +717,19 @@ class DatabaseManager:
 
     def get_retention_risk(self, days: int = 7) -> List[Dict[str, Any]]:
         """Members with no workout in last X days."""
-        self.refresh_cache()
+        self.refresh_cache("members", "attendance")
+        snap = self.snapshot
         risk = []
         now = datetime.datetime.now()
         
-        # 1. Map each user to their LAST workout date
-        last_workouts = {}
-        for w in self.data["workouts"]:
-            uid = str(w.get("User ID"))
-            try:
-                w_date = datetime.datetime.strptime(w.get("Date"), "%Y-%m-%d")
-                if uid not in last_workouts or w_date > last_workouts[uid]:
-                    last_workouts[uid] = w_date
-            except: continue
+        # 1. Map each user to their LAST workout date (full history from the attendance store)
+        last_workouts = {
+            uid: datetime.datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0)
+            for uid, ts in snap.attendance.last_seen().items()
+        }
 
         # 2. Compare against active members
-        for m in self.data["members"]:
+        for m in snap.members.members:
             if m.get("Status") != "Active": continue
             
             uid = str(m.get("User ID"))
@@ -394,22 +752,20 @@ class DatabaseManager:
         return sorted(risk, key=lambda x: x["inactive_days"], reverse=True)
 
     def get_daily_attendance(self, date_str: Optional[str] = None) -> List[Dict[str, Any]]:
-        self.refresh_cache()
+        self.refresh_cache("attendance")
         if not date_str:
             date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-        return [w for w in self.data["workouts"] if w.get("Date") == date_str]
+        return [w for w in self.snapshot.workouts if w.get("Date") == date_str]
 
     def get_top_active_members(self, limit: int = 10) -> List[Dict[str, Any]]:
-        self.refresh_cache()
-        counts = {}
-        for w in self.data["workouts"]:
-            uid = str(w.get("User ID"))
-            counts[uid] = counts.get(uid, 0) + 1
-        
+        self.refresh_cache("members", "attendance")
+        snap = self.snapshot
+        counts = snap.attendance.visit_counts()
+
         sorted_uids = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:limit]
         top_members = []
         for uid, count in sorted_uids:
-            member = self.get_member(uid)
+            member = snap.members.by_id.get(uid)
             if member:
                 member_copy = member.copy()
                 member_copy["workout_count"] = count
@@ -417,8 +773,8 @@ class DatabaseManager:
         return top_members
 
     def get_growth_stats(self) -> Dict[str, Any]:
-        self.refresh_cache()
-        history = self.payment_history_sheet.get_all_records()
+        self.refresh_cache("members")
+        history = self._read_records("payments", self.payment_history_sheet)
         now = datetime.datetime.now()
         current_month_str = now.strftime("%Y-%m")
         last_month = now.replace(day=1) - datetime.timedelta(days=1)
@@ -426,8 +782,9 @@ class DatabaseManager:
         
         this_month_rev = 0
         last_month_rev = 0
-        this_month_members = 0
-        last_month_members = 0
+        join_month_counts = self.snapshot.members.join_month_counts
+        this_month_members = join_month_counts.get(current_month_str, 0)
+        last_month_members = join_month_counts.get(last_month_str, 0)
 
         for entry in history:
             amt_str = str(entry.get("Amount", "0")).replace("₹", "").replace(",", "").strip()
@@ -441,13 +798,6 @@ class DatabaseManager:
             elif date_str.startswith(last_month_str):
                 last_month_rev += amt
 
-        for m in self.data["members"]:
-            join_date = m.get("Join Date", "")
-            if join_date.startswith(current_month_str):
-                this_month_members += 1
-            elif join_date.startswith(last_month_str):
-                last_month_members += 1
-
         rev_growth = ((this_month_rev - last_month_rev) / last_month_rev * 100) if last_month_rev > 0 else 100
         mem_growth = ((this_month_members - last_month_members) / last_month_members * 100) if last_month_members > 0 else 100
 
@@ -456,47 +806,46 @@ class DatabaseManager:
             "rev_growth": f"{'+' if rev_growth >= 0 else ''}{rev_growth:.1f}%",
             "member_growth": f"{'+' if mem_growth >= 0 else ''}{mem_growth:.1f}%",
             "this_month": {"revenue": this_month_rev, "members": this_month_members},
-            "last_month": {"revenue": last_month_rev, "members": last_month_members}
+            "last_month": {"revenue": last_month_rev, "members": last_month_members},
+            "stale": self.is_stale
         }
 
     def get_occupation_breakdown(self) -> Dict[str, int]:
-        self.refresh_cache()
-        counts = {}
-        for m in self.data["members"]:
-            occ = m.get("Occupation", "Other")
-            counts[occ] = counts.get(occ, 0) + 1
-        return counts
+        self.refresh_cache("members")
+        return dict(self.snapshot.members.occupation_counts)
 
     def search_members(self, query: str) -> List[Dict[str, Any]]:
-        self.refresh_cache()
+        self.refresh_cache("members")
         q = query.lower()
-        return [m for m in self.data["members"] if q in m.get("Full Name", "").lower() or q in str(m.get("User ID")) or q in str(m.get("Phone", ""))]
+        return [m for m in self.snapshot.members.members if q in m.get("Full Name", "").lower() or q in str(m.get("User ID")) or q in str(m.get("Phone", ""))]
 
     # --- Gym Info ---
     def get_gym_info(self) -> Dict[str, Any]:
-        now = time.time()
-        if self._info_cache and (now - self._last_info_refresh < 300):
-            return self._info_cache
+        return request_cache.memoize("gym_info", "", self._load_gym_info)
 
+    def _load_gym_info(self) -> Dict[str, Any]:
         info = {}
         try:
-            settings = self.settings_sheet.get_all_records()
+            self.refresh_cache("config")
+            if self._info_cache:
+                return self._info_cache  # Cleared by _on_config_change when an info sheet changes
+
+            settings = self._config_records.get("General_Settings", [])
             s_map = {row["Key"]: row["Value"] for row in settings}
-            info["gym_name"] = s_map.get("Gym Name", "Our Gym")
+            info["gym_name"] = s_map.get("Gym Name", "Jashpur Fitness Club")
             info["contact"] = {"phone": s_map.get("Phone", ""), "email": s_map.get("Email", "")}
             info["timings"] = {"monday_to_saturday": s_map.get("Mon-Sat Timing", ""), "sunday": s_map.get("Sunday Timing", "")}
             
-            fees_data = self.fees_structure_sheet.get_all_records()
+            fees_data = self._config_records.get("Fees_Structure", [])
             info["fees"] = {row["Plan Name"].lower().replace(" ", "_"): row["Fee Amount"] for row in fees_data}
             
-            info["trainers"] = self.trainers_info_sheet.get_all_records()
-            kb_data = self.kb_sheet.get_all_records()
+            info["trainers"] = self._config_records.get("Trainers", [])
+            kb_data = self._config_records.get("Knowledge_Base", [])
             info["facilities"] = [row["Detail"] for row in kb_data if row["Category"] == "Facility"]
             info["rules"] = [row["Detail"] for row in kb_data if row["Category"] == "Rule"]
-            info["faq"] = self.faq_sheet.get_all_records()
+            info["faq"] = self._config_records.get("FAQ", [])
             
             self._info_cache = info
-            self._last_info_refresh = now
         except:
              # Fallback
              return {"gym_name": "Jashpur Fitness Club"}
@@ -506,7 +855,8 @@ class DatabaseManager:
         """Get all gym machines."""
         try:
             # Return machines from cached data
-            return self.data.get("machines", [])
+            self.refresh_cache("config")
+            return list(self.snapshot.machines)
         except Exception as e:
             print(f"❌ Error getting machines: {e}")
             return []
@@ -528,7 +878,7 @@ class DatabaseManager:
                 "",  # Notes (empty for now)
             ]
             
-            self.attendance_sheet.append_row(row)
+            self._write("append", "Attendance", row, wait=False)
             print(f"✅ Attendance logged: {name} - {action} at {time}")
         except Exception as e:
             print(f"❌ Failed to log attendance: {e}")
@@ -536,7 +886,7 @@ class DatabaseManager:
     def get_member_attendance(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Get member's recent attendance records."""
         try:
-            all_records = self.attendance_sheet.get_all_records()
+            all_records = self._read_records("attendance", self.attendance_sheet)
             user_records = [
                 r for r in all_records 
                 if str(r.get('User ID')) == str(user_id)
@@ -547,44 +897,85 @@ class DatabaseManager:
         except:
             return []
 
-    def get_members_with_dues(self) -> List[Dict[str, Any]]:
-        """Returns members who have pending dues."""
+    def get_dues_index(self) -> Dict[str, Dict[str, str]]:
+        """
+        Latest due date/amount per User ID from Payment_History, built in one pass over one read.
+        Payment_History has duplicate "Due Date" headers, so raw values are used and the last column wins.
+        """
+        values = self.breaker.call(self.payment_history_sheet.get_all_values)
+        if not values:
+            return {}
+        header = values[0]
+
+        def last_col(name: str) -> int:
+            return max((i for i, h in enumerate(header) if h == name), default=-1)
+
+        uid_col, date_col, amount_col = last_col("User ID"), last_col("Due Date"), last_col("Due Amount")
+        if uid_col == -1:
+            return {}
+        index = {}
+        for row in values[1:]:
+            if uid_col >= len(row) or not row[uid_col]:
+                continue
+            # Later rows overwrite earlier ones: the latest payment record is the current one
+            index[str(row[uid_col]).strip()] = {
+                "Due Date": row[date_col] if 0 <= date_col < len(row) else "",
+                "Due Amount": row[amount_col] if 0 <= amount_col < len(row) else "0",
+            }
+        return index
+
+    @staticmethod
+    def _due_amount(value: Any) -> float:
+        try:
+            return float(str(value).replace("₹", "").replace(",", "").strip() or 0)
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _parse_due_date(value: Any) -> Optional[datetime.date]:
+        """Due dates are entered as DD-MM-YYYY at registration; accept ISO dates too."""
+        for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
+            try:
+                return datetime.datetime.strptime(str(value).strip(), fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def get_members_with_dues(self, due_on: Optional[datetime.date] = None) -> List[Dict[str, Any]]:
+        """Returns members who have pending dues (optionally only those due on a given date)."""
         try:
+            self.refresh_cache("members")
+            index = self.get_dues_index()
             members_with_dues = []
-            for member in self.data.get("members", []):
-                # Get dues from Payment_History instead of member record
-                due_date, due_amount = self.get_member_dues(member.get('User ID'))
-                
-                if due_amount and float(due_amount) > 0:
-                    member_copy = member.copy()
-                    member_copy['Due Date'] = due_date
-                    member_copy['Due Amount'] = due_amount
-                    members_with_dues.append(member_copy)
+            for member in self.snapshot.members.members:
+                dues = index.get(str(member.get('User ID')).strip())
+                if not dues or self._due_amount(dues["Due Amount"]) <= 0:
+                    continue
+                if due_on and self._parse_due_date(dues["Due Date"]) != due_on:
+                    continue
+                member_copy = member.copy()
+                member_copy['Due Date'] = dues["Due Date"]
+                member_copy['Due Amount'] = dues["Due Amount"]
+                members_with_dues.append(member_copy)
             
             return members_with_dues
         except Exception as e:
             print(f"❌ Error getting members with dues: {e}")
             return []
 
+    def get_members_with_due_date(self, date_str: str) -> List[Dict[str, Any]]:
+        """Members whose current due date is `date_str` (DD-MM-YYYY or YYYY-MM-DD) with an amount owed."""
+        due_on = self._parse_due_date(date_str)
+        if due_on is None:
+            return []
+        return self.get_members_with_dues(due_on=due_on)
+
     def update_member_dues(self, user_id: int, due_date: str, due_amount: str) -> bool:
         """Update due date and amount in Payment_History (latest record)."""
         try:
-            # Find the latest payment record for this user
-            payments = self.payment_history_sheet.get_all_records()
-            
-            # Find the last row for this user
-            row_idx = None
-            for i in range(len(payments) - 1, -1, -1):  # Search from bottom
-                if str(payments[i].get('User ID')) == str(user_id):
-                    row_idx = i + 2  # +1 for 1-indexing, +1 for header
-                    break
-            
-            if row_idx:
-                # Update columns N (Due Date) and O (Due Amount)
-                # Note: Payment_History has duplicate "Due Date" columns (10 and 13)
-                # We update the last ones (columns 13 and 14)
-                self.payment_history_sheet.update_cell(row_idx, 13, due_date)  # Column M (Due Date)
-                self.payment_history_sheet.update_cell(row_idx, 14, due_amount)  # Column N (Due Amount)
+            # The row itself is looked up when the journaled write is applied
+            if self.get_latest_payment(user_id):
+                self._write("member_dues", str(user_id), due_date, due_amount)
                 print(f"✅ Updated dues for user {user_id}: Due Date={due_date}, Due Amount={due_amount}")
                 return True
             else:
@@ -602,35 +993,14 @@ class DatabaseManager:
             if not member:
                 return False
             
-            # Find member row index
-            row_idx = -1
-            for i, m in enumerate(self.data.get("members", [])):
-                if str(m.get("User ID")) == str(user_id):
-                    row_idx = i + 2  # +1 for 1-indexing, +1 for headers
-                    break
-            
-            if row_idx == -1:
-                return False
-            
-            # Clear due date and due amount in Members sheet
-            # Assuming Due Date is column N and Due Amount is column O
-            self.members_sheet.update(values=[["", "0"]], range_name=f"N{row_idx}:O{row_idx}")
-            
-            # Update Payment_History - set Due Payment to 0 for latest transaction
-            # This part is removed as per the instruction, assuming update_member_dues will handle it
-            # payment_history = self.payment_history_sheet.get_all_records()
-            # for i, payment in enumerate(reversed(payment_history)):
-            #     if str(payment.get('User ID')) == str(user_id):
-            #         actual_row = len(payment_history) - i + 1  # +1 for header
-            #         # Due Payment is column I (9th column)
-            #         self.payment_history_sheet.update(values=[["0"]], range_name=f"I{actual_row}")
-            #         break
-            
-            # Use the new helper to update the payment history
-            self.update_member_dues(user_id, "", "0") # Clear due date and set amount to 0
+            # Clear due date/amount on the Members row and on the latest payment, journaled as one unit
+            self._write_batch([
+                ("clear_member_due", (str(user_id),)),
+                ("member_dues", (str(user_id), "", "0")),
+            ])
             
             # Refresh cache
-            self.refresh_cache()
+            self.refresh_cache("members")
             
             print(f"✅ Marked due as paid for user {user_id}")
             return True
@@ -662,7 +1032,11 @@ class DatabaseManager:
                 ""   # Notes (empty)
             ]
             
-            self.attendance_sheet.append_row(row)
+            # Acknowledged once journaled to disk; the flusher sends it and the local store has it meanwhile
+            self._write("append", "Attendance", row, wait=False)
+            self._edit_attendance(lambda store: store.append(
+                user_id, store.to_epoch(date, checkin_time) or int(time.time()), 0, session_id, local=True))
+            request_cache.invalidate("session", user_id)
             print(f"✅ Session created: {session_id} - {name} checked in at {checkin_time}")
             return session_id
         except Exception as e:
@@ -671,34 +1045,53 @@ class DatabaseManager:
     
     def get_active_session(self, user_id: int):
         """Get user's active session (checked in but not checked out)."""
+        return request_cache.memoize("session", user_id, lambda: self._find_active_session(user_id))
+
+    def _find_active_session(self, user_id: int):
+        if self.is_stale:
+            # Sheets unreachable: the local store also knows check-ins journaled during the outage
+            return self.snapshot.attendance.open_session(user_id)
         try:
             # Get all records
-            records = self.attendance_sheet.get_all_records()
+            records = self._read_records("attendance", self.attendance_sheet)
             
-            # Find latest session for this user where Check-Out Time is empty
-            for record in reversed(records):  # Start from most recent
-                if str(record.get("User ID")) == str(user_id) and not record.get("Check-Out Time"):
+            # Check-ins/outs acknowledged but still in the journal are newer than anything in the sheet
+            opened, closed = self._pending_attendance(user_id)
+            for record in reversed(records + opened):  # Start from most recent
+                if (str(record.get("User ID")) == str(user_id) and not record.get("Check-Out Time")
+                        and record.get("Session ID") not in closed):
                     return record
             
             return None
         except Exception as e:
             print(f"❌ Failed to get active session: {e}")
+            if is_transient_error(e):
+                return self.snapshot.attendance.open_session(user_id)
             return None
     
+    def _pending_attendance(self, user_id: int):
+        """(check-in records, checked-out session IDs) for this user that have not reached Sheets yet."""
+        opened, closed = [], set()
+        for entry in self.journal.pending():
+            op, args = entry["op"], entry["args"]
+            # Only check-in rows (SESS_...); workout and legacy log rows share the sheet with other layouts
+            if (op == "append" and args[0] == "Attendance" and str(args[1][0]).startswith("SESS_")
+                    and str(args[1][1]) == str(user_id)):
+                opened.append(dict(zip(ATTENDANCE_HEADERS, args[1])))
+            elif op == "checkout":
+                closed.add(args[0])
+        return opened, closed
+
     def update_checkout(self, session_id: str, checkout_time: str, duration_mins: int) -> bool:
         """Update check-out time and duration for a session."""
         try:
-            # Find the row with this session ID
-            cell = self.attendance_sheet.find(session_id)
-            if not cell:
-                print(f"❌ Session {session_id} not found")
-                return False
-            
-            row_num = cell.row
+            self._write("checkout", session_id, checkout_time, duration_mins, wait=False)
             
-            # Update Check-Out Time (column F) and Duration (column G)
-            self.attendance_sheet.update_cell(row_num, 6, checkout_time)  # Column F
-            self.attendance_sheet.update_cell(row_num, 7, duration_mins)  # Column G
+            # Session IDs look like SESS_<date>_<user_id>_<timestamp>
+            parts = session_id.split("_")
+            if len(parts) >= 4:
+                self._edit_attendance(lambda store: store.close_session(parts[2], int(time.time())))
+                request_cache.invalidate("session", parts[2])
             
             print(f"✅ Session {session_id} updated: checked out at {checkout_time}, duration {duration_mins} mins")
             return True
@@ -726,7 +1119,7 @@ class DatabaseManager:
     def get_latest_payment(self, user_id: int):
         """Get the most recent payment record for a user."""
         try:
-            payments = self.payment_history_sheet.get_all_records()
+            payments = self._read_records("payments", self.payment_history_sheet)
             user_payments = [p for p in payments if str(p.get('User ID')) == str(user_id)]
             return user_payments[-1] if user_payments else None
         except Exception as e:
@@ -0,0 +1,103 @@
+"""
+Update Deduplication
+Drops Telegram redeliveries by remembering recently seen update_ids for a time window
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+logger = logging.getLogger(__name__)
+
+DEDUPE_WINDOW = float(os.getenv("DEDUPE_WINDOW", "3600"))   # Telegram gives up redelivering well before this
+DEDUPE_MAX_IDS = int(os.getenv("DEDUPE_MAX_IDS", "20000"))
+DEDUPE_STATE_PATH = os.getenv("DEDUPE_STATE_PATH")          # Optional: survive restarts
+
+
+class UpdateDeduplicator:
+    """Bounded, time-windowed set of update_ids, optionally appended to a file as they arrive."""
+
+    def __init__(self, window: float = DEDUPE_WINDOW, max_ids: int = DEDUPE_MAX_IDS, path: Optional[str] = DEDUPE_STATE_PATH):
+        self.window = window
+        self.max_ids = max_ids
+        self.path = path
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._lines = 0
+        self.dropped = 0
+        if path:
+            self._load()
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        cutoff = time.time() - self.window
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    update_id, ts = int(line.split()[0]), float(line.split()[1])
+                except (ValueError, IndexError):
+                    continue
+                if ts >= cutoff:
+                    self._seen[update_id] = ts
+                else:
+                    self._seen.pop(update_id, None)  # Expired, or discarded (written with ts 0)
+        self._evict(time.time())
+        self._rewrite()  # Compact: keep only what is still inside the window
+
+    def _rewrite(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{uid} {ts:.0f}\n" for uid, ts in self._seen.items())
+        os.replace(tmp, self.path)
+        self._lines = len(self._seen)
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._seen and (len(self._seen) > self.max_ids or next(iter(self._seen.values())) < cutoff):
+            self._seen.popitem(last=False)
+
+    def add(self, update_id: int) -> bool:
+        """Record an update_id; False if it was already seen inside the window (a replay)."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if update_id in self._seen:
+                self.dropped += 1
+                return False
+            self._seen[update_id] = now
+            self._append(update_id, now)
+            return True
+
+    def _append(self, update_id: int, ts: float) -> None:
+        if not self._file:
+            return
+        self._file.write(f"{update_id} {ts:.0f}\n")
+        self._file.flush()
+        self._lines += 1
+        if self._lines > 2 * self.max_ids:
+            self._file.close()
+            self._rewrite()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def discard(self, update_id: int) -> None:
+        """Forget an update that was not actually processed (e.g. rejected by backpressure)."""
+        with self._lock:
+            if self._seen.pop(update_id, None) is not None:
+                self._append(update_id, 0)
+
+    def handler_callback(self):
+        """TypeHandler callback (group -2) that stops replays before any other handler runs."""
+        async def drop_replays(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            if not self.add(update.update_id):
+                logger.info(f"🔁 Dropping replayed update {update.update_id}")
+                raise ApplicationHandlerStop
+        return drop_replays
@@ -0,0 +1,64 @@
+"""
+Duplicate Press Guard
+Absorbs repeated taps of the same button (or the same question) while the first one is still being handled
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_WINDOW = float(os.getenv("DEBOUNCE_WINDOW", "2"))  # Seconds after a reply in which a repeat is still a duplicate
+
+
+class InFlightGuard:
+    """
+    Per (user, key) guard. A repeat arriving while the first call runs waits for and shares its result;
+    a repeat that was *sent* before the first call finished (or within `window` after it) is absorbed.
+    The second case matters because updates from one chat are processed in order, so the repeat
+    usually reaches us only after the original completed.
+    """
+
+    def __init__(self, window: float = DEBOUNCE_WINDOW):
+        self.window = window
+        self._running: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._finished: Dict[Tuple[int, Hashable], Tuple[float, Any]] = {}
+        self.absorbed = 0
+
+    async def run(self, user_id: int, key: Hashable, sent_at: float,
+                  fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, duplicate). `sent_at` is the message timestamp (epoch seconds)."""
+        slot = (user_id, key)
+        running = self._running.get(slot)
+        if running is not None:
+            self.absorbed += 1
+            return await asyncio.shield(running), True
+
+        finished = self._finished.get(slot)
+        if finished and sent_at <= finished[0] + self.window:
+            self.absorbed += 1
+            return finished[1], True
+
+        fut = asyncio.get_running_loop().create_future()
+        self._running[slot] = fut
+        try:
+            result = await fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # Mark retrieved: nobody may be waiting on it
+            raise
+        else:
+            fut.set_result(result)
+            self._finished[slot] = (time.time(), result)
+            return result, False
+        finally:
+            del self._running[slot]
+            self._prune()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.window - 60  # Keep a margin for clock skew against Telegram's timestamps
+        for slot in [s for s, (at, _) in self._finished.items() if at < cutoff]:
+            del self._finished[slot]
@@ -0,0 +1,96 @@
+"""
+Webhook Update Ingestion
+Bounded per-shard queues drained by worker tasks, so the webhook can answer Telegram immediately
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "100"))  # Per worker
+
+
+def shard_key(update: Update) -> int:
+    """Updates from one chat always land on the same worker, so they are handled in order."""
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return update.update_id
+
+
+class UpdateIngestor:
+    """
+    N workers, each owning a bounded queue. `submit()` never waits: it returns False when the
+    chat's queue is full, and the caller pushes back (Telegram redelivers later).
+    """
+
+    def __init__(self, application, workers: int = WEBHOOK_WORKERS, queue_size: int = WEBHOOK_QUEUE_SIZE):
+        self.application = application
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(q), name=f"update-worker-{i}")
+                       for i, q in enumerate(self._queues)]
+        logger.info(f"📥 Update ingestion: {self.workers} workers x {self.queue_size} queued updates")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let queued updates finish (up to `timeout`), then stop the workers."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Stopping with {self.depth} updates still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, update: Update) -> bool:
+        queue = self._queues[shard_key(update) % self.workers]
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.application.process_update(update)
+            except Exception as e:
+                logger.error(f"❌ Error processing update {update.update_id}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    @property
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self.depth,
+            "busiest_queue": max((q.qsize() for q in self._queues), default=0),
+            "queue_size": self.queue_size,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+        }
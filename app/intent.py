@@ -1,24 +1,23 @@
-from app.ai import ask_ai
+import os
+import json
+import asyncio
+import logging
+from typing import Optional, Tuple
 
-def get_gym_name():
-    try:
-        from app.responses import db
-        if db:
-            return db.get_gym_info().get("gym_name", "the gym")
-    except:
-        pass
-    return "the gym"
+from app.ai import ask_ai_async, AI_COMBINED_BUDGET, AI_HEDGE_AFTER, AI_INTENT_BUDGET
+from app.intent_model import ALLOWED_INTENTS, INTENT_CONFIDENCE, classify, log_labelled
+from app.intent_cache import intent_cache, normalize
+from app.db import INFO_SHEETS
+from app.responses import db
 
-def detect_intent(message: str) -> str:
-    """Detects the user's intent using GPT-powered strict classification with gym context."""
-    
-    gym_name = get_gym_name()
-    
-    prompt = f"""
-You are the AI brain of '{gym_name}'. 
-Your ONLY job is to classify the user's message into the correct category (intent).
+logger = logging.getLogger(__name__)
+
+AI_COMBINED = os.getenv("AI_COMBINED", "true").lower() == "true"
+# Intents whose reply is AI-written anyway: the combined call answers them in the same round trip.
+# Workout/diet plans are not among them: they go through the plan cache and are streamed.
+ANSWERED_INTENTS = ("unknown",)
 
-LISTED INTENTS:
+INTENT_GUIDE = """LISTED INTENTS:
 - greeting: "Hi", "Hello", "Hey", "Good morning". 
 - goodbye: "Bye", "Thanks", "Thank you", "See you later".
 - help: "What can you do?", "Help me", "How does this work?", "/help", "/start".
@@ -38,21 +37,113 @@ RULES:
 1. Always prefer a specific gym intent over 'unknown'.
 2. '/start' and '/help' are always the 'help' intent.
 3. Be efficient. Choose the one that matches the core meaning.
+"""
 
+def _on_gym_info_change(dataset, changed) -> None:
+    # Intents are classified against the gym's own info; start over when it changes
+    if any(name in INFO_SHEETS for name in changed):
+        intent_cache.clear()
+
+if db:
+    db.datasets.on_change("config", _on_gym_info_change)
+
+def get_gym_name():
+    try:
+        from app.responses import db
+        if db:
+            return db.get_gym_info().get("gym_name", "the gym")
+    except:
+        pass
+    return "the gym"
+
+def _local_intent(message: str) -> Tuple[str, Optional[str]]:
+    """(cache key, intent) from the intent cache or the local classifier; intent is None when unsure."""
+    key = normalize(message)  # Empty for emoji/punctuation-only messages: not cached
+    cached = intent_cache.get(key) if key else None
+    if cached:
+        return key, cached
+
+    local_intent, confidence, source = classify(message)
+    if local_intent and confidence >= INTENT_CONFIDENCE:
+        logger.info(f"⚡ Intent '{local_intent}' via {source} ({confidence:.2f})")
+        if key:
+            intent_cache.set(key, local_intent)
+        return key, local_intent
+    return key, None
+
+def _remember(key: str, message: str, intent: str) -> None:
+    # Labelled by the LLM: training data for `python -m app.intent_model retrain`
+    log_labelled(message, intent, "llm")
+    if key:
+        intent_cache.set(key, intent)
+
+async def detect_intent(message: str) -> str:
+    """Detects the user's intent: local rules/model first, GPT-powered strict classification when unsure."""
+    
+    key, local_intent = _local_intent(message)
+    if local_intent:
+        return local_intent
+
+    gym_name = await asyncio.to_thread(get_gym_name)
+    
+    prompt = f"""
+You are the AI brain of '{gym_name}'. 
+Your ONLY job is to classify the user's message into the correct category (intent).
+
+{INTENT_GUIDE}
 User message: "{message}"
 
 Reply ONLY with the exact intent name from the list above. No other text.
 """
 
-    intent = ask_ai(prompt).lower().strip().replace(" ", "_")
+    # Latency-critical and tiny: tight budget, and race the other provider if the first is slow
+    intent = (await ask_ai_async(prompt, timeout=AI_INTENT_BUDGET, sections=(), hedge_after=AI_HEDGE_AFTER)).lower().strip().replace(" ", "_")
     
     # Strict validation
-    allowed_intents = [
-        "greeting", "goodbye", "help", "gym_timing", "fees", 
-        "workout", "diet", "log_workout", "check_membership", 
-        "view_schedule", "view_facilities", "book_trial", "register_start", "unknown"
-    ]
-    if intent not in allowed_intents:
+    if intent not in ALLOWED_INTENTS:
         return "unknown"
-        
+
+    _remember(key, message, intent)
     return intent
+
+async def detect_intent_and_answer(message: str) -> Tuple[str, Optional[str]]:
+    """
+    (intent, answer) with at most one LLM call: the model both classifies the message and, for
+    unknown, writes the reply. answer is None when the intent's handler should reply.
+    """
+    key, local_intent = _local_intent(message)
+    if local_intent:
+        return local_intent, None
+
+    gym_name = await asyncio.to_thread(get_gym_name)
+    prompt = f"""
+You are the AI brain of '{gym_name}'. Classify the user's message into the correct category (intent)
+and, only for the intent unknown, also write the reply.
+
+{INTENT_GUIDE}
+4. unknown: the answer is a short helpful reply to the message. For every other intent the answer is null.
+
+User message: "{message}"
+
+Reply ONLY with a JSON object: {{"intent": "<intent name>", "answer": "<reply text, or null>"}}
+"""
+    # On the default path for free text: same tail-latency protection as plain classification
+    raw = await ask_ai_async(prompt, timeout=AI_COMBINED_BUDGET, json_mode=True, max_tokens=400,
+                             hedge_after=AI_HEDGE_AFTER)
+    try:
+        text = raw.strip()
+        if text.startswith("```"):
+            text = text.strip("`").removeprefix("json").strip()
+        data = json.loads(text)
+        intent = str(data.get("intent", "")).lower().strip().replace(" ", "_")
+        answer = data.get("answer")
+    except (ValueError, AttributeError):
+        logger.warning(f"⚠️ Combined intent reply was not JSON: {raw[:80]}")
+        return "unknown", None  # handle_intent falls back to a plain AI answer
+
+    if intent not in ALLOWED_INTENTS:
+        return "unknown", None
+    _remember(key, message, intent)
+    if intent not in ANSWERED_INTENTS or not isinstance(answer, str) or not answer.strip():
+        return intent, None
+    return intent, answer.strip()
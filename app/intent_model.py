@@ -0,0 +1,193 @@
+"""
+Local Intent Classifier
+Keyword rules plus a small naive-Bayes model, so common messages never need an LLM call
+
+Retrain from messages the LLM labelled in production:
+    python -m app.intent_model retrain [intent_log.jsonl]
+Try a message:
+    python -m app.intent_model classify "when do you open on sunday"
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import threading
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.workout_parser import ACTIVITIES
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_PATH = os.path.join(BASE_DIR, "intent_examples.json")
+INTENT_LOG_PATH = os.getenv("INTENT_LOG_PATH", "intent_log.jsonl")  # Empty string disables logging
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.85"))  # Below this the LLM decides
+# Naive Bayes is overconfident, so the model also abstains unless (tuned on leave-one-out over the examples):
+INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "4.0"))            # best beats runner-up by this many nats
+INTENT_MIN_COVERAGE = float(os.getenv("INTENT_MIN_COVERAGE", "0.75"))  # share of words the model has seen
+INTENT_MIN_KNOWN = int(os.getenv("INTENT_MIN_KNOWN", "2"))          # known words in the message
+INTENT_MAX_WORDS = int(os.getenv("INTENT_MAX_WORDS", "6"))          # longer messages carry detail it can't read
+
+ALLOWED_INTENTS = [
+    "greeting", "goodbye", "help", "gym_timing", "fees",
+    "workout", "diet", "log_workout", "check_membership",
+    "view_schedule", "view_facilities", "book_trial", "register_start", "unknown"
+]
+
+# "log/record/track ..." is a workout log only with workout content: an exercise, or a number with a unit
+_WORKOUT_CONTENT = "|".join(sorted((re.escape(p) for ps in ACTIVITIES.values() for p in ps), key=len, reverse=True))
+_WORKOUT_CONTENT = rf"\b(workout|exercise|training|{_WORKOUT_CONTENT})\b|\d+\s*(x\s*\d+|sets?|reps?|kgs?|lbs?|km|mins?|minutes?|hrs?|hours?)\b"
+
+# Unambiguous phrasings, matched before the model
+RULES: List[Tuple[str, "re.Pattern"]] = [
+    ("help", re.compile(r"^/(start|help)\b")),
+    ("greeting", re.compile(r"^(hi+|hello+|hey+|helo|namaste|yo|good (morning|afternoon|evening))( (there|bot|bro|sir|buddy))?[!. ]*$")),
+    ("goodbye", re.compile(r"^(ok(ay)? )?(bye( bye)?|thanks?( you)?( (so much|a lot|bro))?|thx|ty|cya|see you( later| tomorrow)?|good night)[!. ]*$")),
+    ("log_workout", re.compile(r"\b\d+\s*(x\s*\d+|sets?|reps?)\b")),
+    ("log_workout", re.compile(rf"^(please )?(log|record|track)\b(?! ?in\b)(?=.*({_WORKOUT_CONTENT}))")),
+    ("gym_timing", re.compile(r"^(what are (the|your) )?(gym )?(timings?|hours|opening hours|opening time|closing time)( please)?[?!. ]*$")),
+    ("gym_timing", re.compile(r"^(when|what time) (do|does) (you|the gym) (open|close)\b")),
+    ("fees", re.compile(r"^(what (are|is) (the|your) )?(gym |membership |monthly )?(fees?|prices?|charges|cost|price list|fee structure)( please)?[?!. ]*$")),
+    ("fees", re.compile(r"^how much (is|does|for) (the |a )?(membership|gym|joining|\w+ plan|\d+ months?)\b")),
+    ("diet", re.compile(r"^(a |my )?(diet|meal|nutrition) (plan|chart)( please)?[?!. ]*$")),
+    ("workout", re.compile(r"^(a |my )?(workout|exercise|training|gym) (plan|routine)( please)?[?!. ]*$")),
+]
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    """Multinomial naive Bayes over unigrams and bigrams (Laplace smoothing)."""
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self.word_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.doc_counts: Counter = Counter()
+        self.examples: Dict[str, str] = {}  # Labelled phrase (tokens joined) -> intent
+        for intent, texts in examples.items():
+            for text in texts:
+                self.examples[" ".join(_TOKEN.findall(text.lower()))] = intent
+                self.doc_counts[intent] += 1
+                self.word_counts[intent].update(tokenize(text))
+        self.vocab = set().union(*self.word_counts.values()) if self.word_counts else set()
+        total_docs = sum(self.doc_counts.values())
+        self.log_prior = {i: math.log(n / total_docs) for i, n in self.doc_counts.items()}
+        self.totals = {i: sum(c.values()) for i, c in self.word_counts.items()}
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        (intent, confidence); (None, 0.0) when the message is too long, too unfamiliar or too
+        close between two intents for the model to be trusted.
+        """
+        all_tokens = tokenize(text)
+        words = [t for t in all_tokens if "_" not in t]
+        known = [t for t in words if t in self.vocab]
+        if (not words or len(words) > INTENT_MAX_WORDS or len(known) < INTENT_MIN_KNOWN
+                or len(known) / len(words) < INTENT_MIN_COVERAGE):
+            return None, 0.0
+        tokens = [t for t in all_tokens if t in self.vocab]
+        v = len(self.vocab)
+        scores = {
+            intent: prior + sum(math.log((self.word_counts[intent][t] + 1) / (self.totals[intent] + v)) for t in tokens)
+            for intent, prior in self.log_prior.items()
+        }
+        best, runner_up = sorted(scores, key=scores.get, reverse=True)[:2]
+        top = scores[best]
+        if top - scores[runner_up] < INTENT_MARGIN:
+            return None, 0.0
+        confidence = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        return best, confidence
+
+
+def load_examples(path: str = EXAMPLES_PATH) -> Dict[str, List[str]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_model: Optional[IntentModel] = None
+_model_lock = threading.Lock()
+
+def get_model() -> IntentModel:
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = IntentModel(load_examples())
+    return _model
+
+
+def classify(message: str) -> Tuple[Optional[str], float, str]:
+    """(intent, confidence, source): source is "example", "rule" or "model"."""
+    text = " ".join(message.lower().split())
+    model = get_model()
+    known = model.examples.get(" ".join(_TOKEN.findall(text)))
+    if known:
+        return known, 1.0, "example"  # One of the labelled phrases, word for word
+    for intent, pattern in RULES:
+        if pattern.search(text):
+            return intent, 1.0, "rule"
+    intent, confidence = model.predict(text)
+    return intent, confidence, "model"
+
+
+_log_lock = threading.Lock()
+
+def log_labelled(message: str, intent: str, source: str) -> None:
+    """Append a labelled message for later retraining (no-op when INTENT_LOG_PATH is empty)."""
+    if not INTENT_LOG_PATH:
+        return
+    try:
+        with _log_lock, open(INTENT_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": message, "intent": intent, "source": source}, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not log intent label: {e}")
+
+
+def retrain(log_path: str = INTENT_LOG_PATH, examples_path: str = EXAMPLES_PATH) -> Dict[str, int]:
+    """Merge LLM-labelled messages from the log into the shipped examples. Returns added count per intent."""
+    examples = load_examples(examples_path)
+    known = {t.lower() for texts in examples.values() for t in texts}
+    added: Counter = Counter()
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            text = " ".join(str(entry.get("text", "")).lower().split())
+            intent = entry.get("intent")
+            if entry.get("source") != "llm" or intent not in ALLOWED_INTENTS or intent == "unknown":
+                continue
+            if not text or text in known or len(text) > 200:
+                continue
+            examples.setdefault(intent, []).append(text)
+            known.add(text)
+            added[intent] += 1
+    tmp = f"{examples_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(examples, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, examples_path)
+    global _model
+    _model = None  # Rebuilt from the new examples on next use
+    return dict(added)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "retrain":
+        counts = retrain(sys.argv[2] if len(sys.argv) > 2 else INTENT_LOG_PATH)
+        print(f"✅ Added {sum(counts.values())} examples: {counts or 'nothing new'}")
+    elif command == "classify" and len(sys.argv) > 2:
+        intent, confidence, source = classify(" ".join(sys.argv[2:]))
+        print(f"🤖 {intent} ({confidence:.2f} via {source})")
+    else:
+        print(__doc__)
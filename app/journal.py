@@ -0,0 +1,86 @@
+"""
+Write-Ahead Journal
+Append-only local log of intended Sheets mutations, so a write survives crashes and outages until it lands
+"""
+
+import os
+import json
+import uuid
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteJournal:
+    """
+    JSON-lines file of `{"id", "op", "args"}` entries plus `{"done": id}` markers.
+    An entry is fsynced before it is sent anywhere; whatever has no done marker is replayed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from a crash mid-write: it was never acknowledged
+                if "done" in entry:
+                    self._pending.pop(entry["done"], None)
+                else:
+                    entry["replay"] = True  # May already have reached Sheets before the restart
+                    self._pending[entry["id"]] = entry
+        if self._pending:
+            logger.warning(f"📒 Write journal has {len(self._pending)} unconfirmed writes to replay")
+
+    def record(self, ops: Sequence[Tuple[str, Sequence[Any]]]) -> List[str]:
+        """Durably append one or more mutations as a unit; returns their entry IDs."""
+        entries = [{"id": uuid.uuid4().hex, "op": op, "args": list(args), "ts": time.time()} for op, args in ops]
+        with self._lock:
+            self._file.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            for e in entries:
+                self._pending[e["id"]] = e
+        return [e["id"] for e in entries]
+
+    def mark_done(self, entry_id: str) -> None:
+        """Confirm an entry reached Sheets. Not fsynced: losing a marker only costs an idempotent replay."""
+        with self._lock:
+            if self._pending.pop(entry_id, None) is None:
+                return
+            if self._pending:
+                self._file.write(json.dumps({"done": entry_id}) + "\n")
+                self._file.flush()
+            else:
+                self._file.truncate(0)  # Nothing outstanding: start the file over
+
+    def mark_attempted(self, entry_id: str) -> None:
+        """An attempt failed midway; the mutation may or may not have been applied."""
+        with self._lock:
+            if entry_id in self._pending:
+                self._pending[entry_id]["replay"] = True
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Unconfirmed entries, oldest first."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def is_pending(self, entry_id: str) -> bool:
+        with self._lock:
+            return entry_id in self._pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
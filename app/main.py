@@ -9,7 +9,8 @@ from telegram.ext import (
     filters,
     CommandHandler,
     ConversationHandler,
-    CallbackQueryHandler
+    CallbackQueryHandler,
+    TypeHandler
 )
 from dotenv import load_dotenv
 
@@ -27,7 +28,13 @@ load_dotenv()
 
 from app.intent import detect_intent
 from app.responses import handle_intent, db
-from app.ai import ask_ai
+from app.ai import ask_ai, close_ai_clients
+from app.request_cache import begin_update_scope
+from app.broadcast import resume_broadcasts
+from app.outbound import PriorityRateLimiter
+from app.dedupe import UpdateDeduplicator
+from app.update_processor import PerChatUpdateProcessor
+from app.backlog import drain_backlog
 from app.ui import get_keyboard, BUTTON_TO_INTENT
 from app.constants import (
     IDLE, GET_NAME, GET_PHONE, GET_ADDRESS, GET_OCCUPATION, 
@@ -68,9 +75,30 @@ if not BOT_TOKEN:
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.error(f"Error handling update: {context.error}")
 
-def create_application():
-    """Shared application factory for polling and webhooks."""
-    app = Application.builder().token(BOT_TOKEN).build()
+async def post_init(application: Application) -> None:
+    """Runs once the bot is initialized (polling mode)."""
+    await resume_broadcasts(application.bot)
+    # Catch up on what queued up while we were down, minus repeated taps and stale menu navigation
+    await drain_backlog(application)
+
+async def post_shutdown(application: Application) -> None:
+    await close_ai_clients()
+
+def create_application(dedupe: bool = True):
+    """
+    Shared application factory for polling and webhooks.
+    dedupe=True drops replayed update_ids inside the application; the webhook passes False
+    because it dedupes at ingest, before updates are queued.
+    """
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .rate_limiter(PriorityRateLimiter())  # Interactive replies ahead of broadcasts/reminders
+        .concurrent_updates(PerChatUpdateProcessor())  # Polling: chats in parallel, each in order
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     conv_handler = ConversationHandler(
         entry_points=[
@@ -100,6 +128,10 @@ def create_application():
         fallbacks=[CommandHandler("start", start)], per_message=False,
     )
 
+    if dedupe:
+        app.add_handler(TypeHandler(Update, UpdateDeduplicator().handler_callback()), group=-2)
+    # Runs first for every update: fresh per-update memo for member/session/gym-info lookups
+    app.add_handler(TypeHandler(Update, begin_update_scope), group=-1)
     app.add_handler(conv_handler)
     app.add_error_handler(error_handler)
     return app
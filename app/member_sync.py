@@ -0,0 +1,138 @@
+"""
+Diff-based Members Sync
+Compares freshly fetched Members rows to the cached ones and applies only what changed
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def row_hash(row: Dict[str, Any]) -> int:
+    """Cheap in-process content hash of one member row."""
+    return hash(tuple(row.items()))
+
+
+def member_key(row: Dict[str, Any]) -> str:
+    return str(row.get("User ID", "")).strip()
+
+
+class MemberDiff:
+    """Inserts, updates and deletes between two versions of the Members sheet (by User ID)."""
+
+    def __init__(self):
+        self.inserts: List[Dict[str, Any]] = []
+        self.updates: List[Dict[str, Any]] = []
+        self.deletes: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.inserts or self.updates or self.deletes)
+
+    def __repr__(self) -> str:
+        return f"MemberDiff(+{len(self.inserts)} ~{len(self.updates)} -{len(self.deletes)})"
+
+
+def diff_members(old_hashes: Dict[str, int], rows: List[Dict[str, Any]]) -> MemberDiff:
+    """Classify fetched rows against the cached row hashes."""
+    diff = MemberDiff()
+    seen = set()
+    for row in rows:
+        uid = member_key(row)
+        if not uid or uid in seen:
+            continue  # Blank or duplicate IDs: first row wins, same as get_member()
+        seen.add(uid)
+        old = old_hashes.get(uid)
+        if old is None:
+            diff.inserts.append(row)
+        elif old != row_hash(row):
+            diff.updates.append(row)
+    diff.deletes = [uid for uid in old_hashes if uid not in seen]
+    return diff
+
+
+class MemberIndex:
+    """
+    Members keyed by User ID plus derived aggregates and rendered text, maintained from diffs.
+    Treated as immutable once published: `sync()` returns a new index and leaves this one intact.
+    """
+
+    def __init__(self):
+        self.members: Tuple[Dict[str, Any], ...] = ()  # Sheet order, as get_all_records() returns
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.row_numbers: Dict[str, int] = {}         # Sheet row (1-indexed, header = row 1)
+        self.hashes: Dict[str, int] = {}
+        self.status_counts: Counter = Counter()
+        self.occupation_counts: Counter = Counter()
+        self.join_month_counts: Counter = Counter()   # "YYYY-MM" -> members joined
+        self._rendered: Dict[str, Dict[str, str]] = {}
+
+    def sync(self, rows: List[Dict[str, Any]]) -> Tuple["MemberIndex", MemberDiff]:
+        """Diff fetched rows against this index; returns a new index with the changes applied."""
+        diff = diff_members(self.hashes, rows)
+        new = self._copy()
+
+        for uid in diff.deletes:
+            new._remove(uid)
+        for row in diff.updates:
+            new._remove(member_key(row))
+            new._add(row)
+        for row in diff.inserts:
+            new._add(row)
+
+        # Row order/positions can shift on any edit; reuse unchanged dicts so references stay stable
+        members = []
+        row_numbers = {}
+        for i, row in enumerate(rows):
+            uid = member_key(row)
+            current = new.by_id.get(uid)
+            members.append(current if current is not None and uid not in row_numbers else row)
+            if uid and uid not in row_numbers:
+                row_numbers[uid] = i + 2
+        new.members = tuple(members)
+        new.row_numbers = row_numbers
+        return new, diff
+
+    def _copy(self) -> "MemberIndex":
+        """Shallow copy-on-write clone (row dicts are shared, containers are not)."""
+        new = MemberIndex()
+        new.members = self.members
+        new.by_id = dict(self.by_id)
+        new.row_numbers = self.row_numbers
+        new.hashes = dict(self.hashes)
+        new.status_counts = Counter(self.status_counts)
+        new.occupation_counts = Counter(self.occupation_counts)
+        new.join_month_counts = Counter(self.join_month_counts)
+        new._rendered = dict(self._rendered)
+        return new
+
+    def _add(self, row: Dict[str, Any]) -> None:
+        uid = member_key(row)
+        self.by_id[uid] = row
+        self.hashes[uid] = row_hash(row)
+        self.status_counts[row.get("Status")] += 1
+        self.occupation_counts[row.get("Occupation", "Other")] += 1
+        self.join_month_counts[str(row.get("Join Date", ""))[:7]] += 1
+
+    def _remove(self, uid: str) -> None:
+        row = self.by_id.pop(uid, None)
+        self.hashes.pop(uid, None)
+        self._rendered.pop(uid, None)
+        if row is None:
+            return
+        for counter, key in (
+            (self.status_counts, row.get("Status")),
+            (self.occupation_counts, row.get("Occupation", "Other")),
+            (self.join_month_counts, str(row.get("Join Date", ""))[:7]),
+        ):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    def render(self, member: Dict[str, Any], kind: str, render_fn: Callable[[Dict[str, Any]], str]) -> str:
+        """Cached rendered text for a member; dropped automatically when the row changes."""
+        uid = member_key(member)
+        if self.by_id.get(uid) is not member:
+            return render_fn(member)  # Not an indexed row (e.g. an annotated copy)
+        cache = self._rendered.setdefault(uid, {})
+        if kind not in cache:
+            cache[kind] = render_fn(member)
+        return cache[kind]
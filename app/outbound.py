@@ -0,0 +1,160 @@
+"""
+Outbound Message Scheduler
+Rate limiter for every Bot API call: interactive replies go first, bulk traffic uses what is left
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Pass as `rate_limit_args=BULK_SEND` on broadcasts, reminders and other background sends
+BULK_SEND = {"priority": "bulk"}
+
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "25"))  # Requests/s across all chats (Telegram: ~30)
+GROUP_INTERVAL = 3.0  # Telegram allows ~20 messages/minute per group chat
+
+
+class PriorityRateLimiter(BaseRateLimiter[Dict[str, Any]]):
+    """
+    Global token bucket drained in priority order, plus per-group pacing.
+    A RetryAfter from Telegram pauses all traffic for the requested time, then the request is retried.
+    """
+
+    def __init__(self, rate: float = OUTBOUND_RATE, max_retries: int = 2):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.max_retries = max_retries
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._group_ready: Dict[Any, float] = {}
+
+        # Metrics
+        self.sent: Counter = Counter()
+        self.throttled: Counter = Counter()      # Requests that had to wait for capacity
+        self.wait_seconds: Counter = Counter()   # Total queueing delay
+        self.retry_after_count = 0
+
+    async def initialize(self) -> None:
+        self._start()
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+    def _start(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to waiting requests, lowest priority number first."""
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                continue  # Caller was cancelled while queued
+            self._tokens -= 1
+            fut.set_result(None)
+
+    async def _acquire(self, priority: int, chat_id: Any) -> None:
+        start = time.monotonic()
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            chat_id = 0  # Username (@channel) or no chat: only the global limit applies
+        if chat_id < 0:
+            # Group chat: pace messages to the per-group limit before taking a global token
+            ready = self._group_ready.get(chat_id, 0.0)
+            self._group_ready[chat_id] = max(ready, start) + GROUP_INTERVAL
+            if ready > start:
+                await asyncio.sleep(ready - start)
+
+        self._start()
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._wakeup.set()
+        await fut
+
+        waited = time.monotonic() - start
+        self.wait_seconds[priority] += waited
+        if waited > 0.05:
+            self.throttled[priority] += 1
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        priority = BULK if (rate_limit_args or {}).get("priority") == "bulk" else INTERACTIVE
+        chat_id = data.get("chat_id")
+        attempt = 0
+        while True:
+            await self._acquire(priority, chat_id)
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else float(e.retry_after)
+                self.retry_after_count += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"⏳ Telegram flood control on {endpoint}: pausing outbound traffic for {delay}s")
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                continue
+            self.sent[priority] += 1
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and throttling stats per priority (for health output)."""
+        depth = Counter(p for p, _, fut in self._waiters if not fut.done())
+        return {
+            "rate_per_sec": self.rate,
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "retry_after": self.retry_after_count,
+            **{
+                name: {
+                    "queued": depth[p],
+                    "sent": self.sent[p],
+                    "throttled": self.throttled[p],
+                    "avg_wait_ms": round(1000 * self.wait_seconds[p] / self.sent[p]) if self.sent[p] else 0,
+                }
+                for p, name in PRIORITY_NAMES.items()
+            },
+        }
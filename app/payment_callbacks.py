@@ -2,54 +2,56 @@
 Callback handler for payment due inline buttons
 """
 
+from datetime import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 
+from app.responses import db
+from app.scheduler import get_reminder_log, render_due_digest
+
 logger = logging.getLogger(__name__)
 
 async def handle_payment_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle inline button callbacks for payment due reminders."""
+    """Handle the due digest buttons: "paid_<uid>_<yyyymmdd>_<page>", "notpaid_..." and "duepg_<page>_<yyyymmdd>"."""
     query = update.callback_query
-    await query.answer()
-    
-    callback_data = query.data
-    
-    # Parse callback data: "paid_USER_ID" or "notpaid_USER_ID"
-    action, user_id = callback_data.split('_', 1)
-    
-    from app.db import db
-    
-    if action == "paid":
-        # Mark due as paid
-        success = db.mark_due_as_paid(int(user_id))
-        
-        if success:
-            # Get member info for confirmation
-            member = db.get_member(int(user_id))
-            name = member.get('Full Name', 'Member') if member else 'Member'
-            
-            await query.edit_message_text(
-                f"✅ *Payment Marked as Paid*\n"
-                f"━━━━━━━━━━━━━━\n\n"
-                f"👤 *Member*: {name}\n"
-                f"💰 *Due Amount*: ₹0 (Cleared)\n\n"
-                f"Payment record updated successfully!",
-                parse_mode="Markdown"
-            )
-            
+    parts = query.data.split('_')
+    action = parts[0]
+
+    if action == "duepg":
+        page, stamp = int(parts[1]), parts[2]
+        await query.answer()
+    else:
+        user_id = parts[1]
+        # Legacy one-member reminders carried only the user ID
+        stamp = parts[2] if len(parts) > 2 else None
+        page = int(parts[3]) if len(parts) > 3 else 0
+        member = db.get_member(user_id)
+        name = member.get('Full Name', 'Member') if member else 'Member'
+
+        if action == "paid":
+            # Mark due as paid
+            if not db.mark_due_as_paid(int(user_id)):
+                await query.answer("❌ Failed to update payment status. Please try again or update manually.", show_alert=True)
+                logger.error(f"❌ Failed to mark payment as paid for user {user_id}")
+                return
+            await query.answer(f"✅ {name}: marked as paid")
             logger.info(f"✅ Marked payment as paid for user {user_id}")
         else:
-            await query.edit_message_text(
-                "❌ Failed to update payment status. Please try again or update manually."
-            )
-            logger.error(f"❌ Failed to mark payment as paid for user {user_id}")
-    
-    elif action == "notpaid":
-        # Just dismiss the notification
-        await query.edit_message_text(
-            f"⏰ *Payment Reminder Dismissed*\n"
-            f"━━━━━━━━━━━━━━\n\n"
-            f"The payment is still pending. You can follow up manually when needed."
-        )
-        logger.info(f"⏰ Payment reminder dismissed for user {user_id}")
+            await query.answer(f"⏰ {name}: still pending")
+            logger.info(f"⏰ Payment reminder dismissed for user {user_id}")
+
+        if stamp is None:
+            status = "✅ *Payment Marked as Paid*" if action == "paid" else "⏰ *Payment Reminder Dismissed*"
+            await query.edit_message_text(f"{status}\n━━━━━━━━━━━━━━\n\n👤 *Member*: {name}", parse_mode="Markdown")
+            return
+
+    # Re-render the digest page: paid members drop off, "not paid yet" ones lose their buttons
+    due_date = datetime.strptime(stamp, "%Y%m%d").strftime("%Y-%m-%d")
+    log = get_reminder_log()
+    if action == "notpaid":
+        log.update(user_id, due_date, admin="notpaid")
+        log.save()
+    dues = db.get_members_with_due_date(due_date)
+    text, markup = render_due_digest(dues, due_date, page, log)
+    await query.edit_message_text(text, reply_markup=markup, parse_mode="Markdown")
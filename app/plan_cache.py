@@ -0,0 +1,134 @@
+"""
+Plan Cache
+Reuses generated workout/diet plans for requests with the same signature (goal, level, focus, diet type)
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Optional, Tuple
+
+from app.ai import TIMEOUT_REPLY
+from app.intent_cache import TTLCache, normalize
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "500"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", str(7 * 86400)))
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH")  # Optional: keep plans across restarts
+
+# First matching keyword wins within each facet
+GOALS = {
+    "weight_loss": ("weight loss", "lose weight", "fat loss", "lose fat", "burn fat", "slim", "cut", "cutting", "reduce weight"),
+    "muscle_gain": ("muscle gain", "gain muscle", "build muscle", "bulk", "bulking", "mass", "weight gain", "gain weight", "muscle"),
+    "strength": ("strength", "stronger", "powerlifting"),
+    "endurance": ("endurance", "stamina", "cardio", "running"),
+    "toning": ("tone", "toning", "lean", "fit", "fitness", "shape"),
+}
+LEVELS = {
+    "beginner": ("beginner", "beginners", "new", "starting", "start", "first time", "novice"),
+    "intermediate": ("intermediate",),
+    "advanced": ("advanced", "experienced", "pro"),
+}
+FOCUS = {
+    "chest": ("chest",), "back": ("back",), "legs": ("legs", "leg"), "arms": ("arms", "arm", "biceps", "triceps"),
+    "shoulders": ("shoulders", "shoulder"), "abs": ("abs", "core", "belly"), "full_body": ("full body", "whole body"),
+}
+DIETS = {
+    "non_veg": ("non veg", "nonveg", "non vegetarian", "chicken", "meat"),  # Before "veg", which it contains
+    "vegan": ("vegan",),
+    "veg": ("veg", "vegetarian", "veggie"),
+    "eggetarian": ("eggetarian", "egg"),
+    "keto": ("keto",),
+}
+# Words that carry no meaning of their own in a plan request
+FILLER = set(
+    "a an the me my i im i'm want need give make create suggest please plan plans for to of and with "
+    "workout workouts exercise exercises routine training diet meal meals food chart schedule "
+    "weekly daily day week good best some can you help get"
+    .split()
+)
+
+
+def _match(text: str, facet: dict) -> Tuple[str, set]:
+    for value, phrases in facet.items():
+        for phrase in phrases:
+            if f" {phrase} " in f" {text} ":
+                return value, set(phrase.split())
+    return "any", set()
+
+
+def plan_signature(intent: str, message: str) -> Optional[Tuple[str, ...]]:
+    """
+    ("workout", goal, level, focus, diet) for requests made only of known keywords, else None.
+    Anything the signature cannot express (an injury, an age, a sport...) must reach the LLM.
+    """
+    text = normalize(message)
+    goal, goal_words = _match(text, GOALS)
+    level, level_words = _match(text, LEVELS)
+    focus, focus_words = _match(text, FOCUS) if intent == "workout" else ("any", set())
+    diet, diet_words = _match(text, DIETS) if intent == "diet" else ("any", set())
+    leftover = set(text.split()) - FILLER - goal_words - level_words - focus_words - diet_words
+    if leftover:
+        return None
+    return intent, goal, level, focus, diet
+
+
+class PlanCache:
+    """TTLCache of plan texts, optionally mirrored to a JSON file."""
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE, ttl: float = PLAN_CACHE_TTL, path: Optional[str] = PLAN_CACHE_PATH):
+        self.cache = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read plan cache: {e}")
+            return
+        cutoff = time.time() - self.ttl
+        for entry in entries:
+            if entry.get("created", 0) >= cutoff:
+                self.cache.set(tuple(entry["key"]), (entry["created"], entry["text"]))
+        logger.info(f"📚 Loaded {len(self.cache)} cached plans")
+
+    def _save(self) -> None:
+        entries = [{"key": list(k), "created": created, "text": text} for k, (created, text) in self.cache.items()]
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def get(self, key) -> Optional[str]:
+        if key is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None or entry[0] < time.time() - self.ttl:  # Wall-clock age, for entries loaded from disk
+            return None
+        return entry[1]
+
+    def set(self, key, text: str) -> None:
+        # Never keep error replies ("⚠️ OpenAI Error: ...", "❌ AI Error: ..."), cut-off or empty answers
+        if key is None or not text or text.startswith(("⚠️", "❌")) or TIMEOUT_REPLY in text:
+            return
+        self.cache.set(key, (time.time(), text))
+        if self.path:
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"⚠️ Could not save plan cache: {e}")
+
+    def stats(self):
+        return self.cache.stats()
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,43 @@
+"""
+Request-Scoped Identity Map
+Memoizes lookups (member, active session, gym info) for the life of one Telegram update
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+# None outside an update (scheduler jobs, startup): lookups are then not memoized
+_current: ContextVar[Optional[Dict[Tuple[str, str], Any]]] = ContextVar("request_cache", default=None)
+
+
+def memoize(kind: str, key: Any, fn: Callable[[], Any]) -> Any:
+    """Return the value already looked up for (kind, key) in this update, else call fn and remember it."""
+    cache = _current.get()
+    if cache is None:
+        return fn()
+    k = (kind, str(key))
+    if k not in cache:
+        cache[k] = fn()  # None results are remembered too
+    return cache[k]
+
+
+def invalidate(kind: Optional[str] = None, key: Any = None) -> None:
+    """Forget memoized values after a write (one key, one kind, or everything)."""
+    cache = _current.get()
+    if not cache:
+        return
+    if kind is None:
+        cache.clear()
+    elif key is None:
+        for k in [k for k in cache if k[0] == kind]:
+            del cache[k]
+    else:
+        cache.pop((kind, str(key)), None)
+
+
+async def begin_update_scope(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """TypeHandler callback (group -1): start a fresh identity map before any other handler runs."""
+    _current.set({})
@@ -1,6 +1,9 @@
 from typing import Optional
 from app.db import DatabaseManager
-from app.ai import ask_ai
+from app.ai import ask_ai_async, AI_HEDGE_AFTER
+from app.plan_cache import plan_cache, plan_signature
+from app.workout_parser import parse_workout
+import asyncio
 import os
 
 # Initialize DatabaseManager carefully
@@ -10,13 +13,25 @@ except Exception:
     db = None
 
 
-def handle_intent(intent: str, user_message: str, user_id: Optional[int] = None) -> str:
+# AI-generated plans: also streamed straight to the chat by the message handler
+PLAN_INTENTS = ("workout", "diet")
+
+# Gym info a plan prompt actually needs (workouts can use the listed facilities)
+def plan_sections(intent: str) -> tuple:
+    return ("facilities",) if intent == "workout" else ()
+
+def plan_prompt(intent: str, user_message: str) -> str:
+    kind = "workout" if intent == "workout" else "diet"
+    return f"Create a professional gym {kind} plan based on this request: {user_message}. Keep it concise and formatted with bullet points."
+
+async def handle_intent(intent: str, user_message: str, user_id: Optional[int] = None) -> str:
     """
     Handles detected intents by returning a formatted response.
     All logic is centralized here to prevent AI from chatting directly.
     """
     # Fetch dynamic gym context
-    ctx = db.get_gym_info() if db else {}
+    # Sheets calls run in a thread so the event loop stays free (usually a cache hit anyway)
+    ctx = await asyncio.to_thread(db.get_gym_info) if db else {}
     gym_name = ctx.get("gym_name", "our gym")
     timings = ctx.get("timings", {})
     fees = ctx.get("fees", {})
@@ -83,21 +98,23 @@ def handle_intent(intent: str, user_message: str, user_id: Optional[int] = None)
             "Click **📝 Join** to get started and select 'Trial' when prompted! 🚀"
         )
 
-    # 3. AI-Powered Plan Generation (Internalized)
-    if intent == "workout":
-        print(f"🧠 Generating Workout Plan for: {user_message}")
-        return ask_ai(f"Create a professional gym workout plan based on this request: {user_message}. Keep it concise and formatted with bullet points.")
-
-    if intent == "diet":
-        print(f"🥗 Generating Diet Plan for: {user_message}")
-        return ask_ai(f"Create a professional gym diet plan based on this request: {user_message}. Keep it concise and formatted with bullet points.")
+    # 3. AI-Powered Plan Generation (Internalized), reusing plans for identical request signatures
+    if intent in PLAN_INTENTS:
+        signature = plan_signature(intent, user_message)
+        cached = plan_cache.get(signature)
+        if cached:
+            return cached
+        print(f"🧠 Generating {intent.title()} Plan for: {user_message}")
+        plan = await ask_ai_async(plan_prompt(intent, user_message), sections=plan_sections(intent))
+        plan_cache.set(signature, plan)
+        return plan
 
     # 4. Database Intents
     if intent == "check_membership":
         if not db:
             return "⚠️ Membership system is offline."
         
-        details = db.get_member(user_id)
+        details = await asyncio.to_thread(db.get_member, user_id)
         if details:
             return (
                 f"👤 *Your Membership Profile*\n"
@@ -123,7 +140,7 @@ def handle_intent(intent: str, user_message: str, user_id: Optional[int] = None)
         if not db:
             return "⚠️ Schedule system is offline."
         
-        classes = db.get_classes()
+        classes = await asyncio.to_thread(db.get_classes)
         if not classes:
             return "📅 No classes are currently scheduled."
         
@@ -140,23 +157,24 @@ def handle_intent(intent: str, user_message: str, user_id: Optional[int] = None)
         if len(user_message.split()) <= 1 and (user_message.lower() == "log" or "📝" in user_message):
             return "📝 I'm ready! Use the format: `Log [workout name]` (e.g., *Log Running 30 mins*) and I'll save it for you."
         
-        # Parsing logic (AI assisted for simplicity and robustness)
+        # Parsing logic: local parser for the usual "Log Running 30 mins" forms, AI for the rest
         extraction_prompt = f"Extract workout details from this message: '{user_message}'. Return JSON with keys: type, duration, notes. Example: 'Log Running 30m' -> {{'type': 'Running', 'duration': '30m', 'notes': ''}}. If duration or notes are missing, use '60m' for duration and empty string for notes. Reply ONLY with JSON."
         import json
         try:
-            raw_json = ask_ai(extraction_prompt).strip()
-            # Clean possible markdown wrap
-            if "```json" in raw_json:
-                raw_json = raw_json.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_json:
-                raw_json = raw_json.split("```")[1].split("```")[0].strip()
-            
-            data = json.loads(raw_json)
+            data = parse_workout(user_message)
+            if data is None:
+                raw_json = (await ask_ai_async(extraction_prompt, timeout=10, sections=(), hedge_after=AI_HEDGE_AFTER)).strip()
+                # Clean possible markdown wrap
+                if "```json" in raw_json:
+                    raw_json = raw_json.split("```json")[1].split("```")[0].strip()
+                elif "```" in raw_json:
+                    raw_json = raw_json.split("```")[1].split("```")[0].strip()
+                data = json.loads(raw_json)
             w_type = data.get("type", "Workout")
             w_dur = data.get("duration", "60m")
             w_notes = data.get("notes", "")
             
-            db.log_workout(user_id, w_type, w_dur, w_notes)
+            await asyncio.to_thread(db.log_workout, user_id, w_type, w_dur, w_notes)
             return f"✅ *Workout Logged!*\n━━━━━━━━━━━━━━\n🏋️‍♂️ *Type*: {w_type}\n🕒 *Duration*: {w_dur}\n📝 *Notes*: {w_notes or 'None'}\n\nKeep it up! 💪"
         except Exception as e:
             print(f"Error logging workout: {e}")
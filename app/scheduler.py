@@ -1,115 +1,164 @@
 """
 Payment Due Reminder Scheduler
-Runs daily at 9 AM to check for payments due tomorrow and send reminders
+Runs daily at 9 AM: gathers tomorrow's dues in one pass, sends the admin one digest and reminds members
 """
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime, timedelta
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+import asyncio
+import json
+import os
 import logging
 
+from app.outbound import BULK_SEND
+
 logger = logging.getLogger(__name__)
 
+DIGEST_PAGE_SIZE = 8
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "8"))
+REMINDER_LOG_PATH = os.getenv("REMINDER_LOG_PATH", "reminders_sent.json")
+
+
+class ReminderLog:
+    """Who was reminded for which due date, and what the admin did about it (persisted as JSON)."""
+
+    def __init__(self, path: str = REMINDER_LOG_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Could not read reminder log: {e}")
+
+    @staticmethod
+    def key(user_id, due_date: str) -> str:
+        return f"{user_id}:{due_date}"
+
+    def get(self, user_id, due_date: str) -> dict:
+        return self.entries.get(self.key(user_id, due_date), {})
+
+    def update(self, user_id, due_date: str, **fields) -> None:
+        self.entries.setdefault(self.key(user_id, due_date), {}).update(fields)
+
+    def save(self) -> None:
+        # Forget entries whose due date is over a month old
+        cutoff = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        self.entries = {k: v for k, v in self.entries.items() if k.rsplit(":", 1)[-1] >= cutoff}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+_reminder_log = None
+
+def get_reminder_log() -> ReminderLog:
+    """Process-wide log shared by the scheduler job and the admin's digest buttons."""
+    global _reminder_log
+    if _reminder_log is None:
+        _reminder_log = ReminderLog()
+    return _reminder_log
+
+
+def _amount(value) -> float:
+    try:
+        return float(str(value).replace("₹", "").replace(",", "").strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def render_due_digest(dues, due_date: str, page: int = 0, log: ReminderLog = None):
+    """One page of the admin digest (text, keyboard). `due_date` is YYYY-MM-DD."""
+    log = log or get_reminder_log()
+    pages = max(1, (len(dues) + DIGEST_PAGE_SIZE - 1) // DIGEST_PAGE_SIZE)
+    page = min(max(page, 0), pages - 1)
+    total = sum(_amount(m.get('Due Amount', 0)) for m in dues)
+    stamp = due_date.replace("-", "")
+    shown_date = datetime.strptime(due_date, "%Y-%m-%d").strftime("%d-%m-%Y")
+
+    text = (
+        f"💰 *PAYMENT DUES - {shown_date}*\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"👥 {len(dues)} members • ⚠️ ₹{total:,.0f} due"
+        + (f" • Page {page + 1}/{pages}" if pages > 1 else "") + "\n\n"
+    )
+    keyboard = []
+    start = page * DIGEST_PAGE_SIZE
+    for n, m in enumerate(dues[start:start + DIGEST_PAGE_SIZE], start=start + 1):
+        uid = m.get('User ID')
+        name = m.get('Full Name', 'Member')
+        admin_status = log.get(uid, due_date).get("admin")
+        mark = " ⏰ _not paid yet_" if admin_status == "notpaid" else ""
+        text += (
+            f"{n}. *{name}* - ₹{m.get('Due Amount', '0')}{mark}\n"
+            f"    📱 {m.get('Phone', 'N/A')} • 💳 {m.get('Plan', 'N/A')} ({m.get('Duration (Months)', 'N/A')} months)\n"
+        )
+        if admin_status != "notpaid":
+            keyboard.append([
+                InlineKeyboardButton(f"✅ {n}. {name}", callback_data=f"paid_{uid}_{stamp}_{page}"),
+                InlineKeyboardButton("⏰ Not Paid Yet", callback_data=f"notpaid_{uid}_{stamp}_{page}"),
+            ])
+    if not dues:
+        text += "✅ All dues for this date are settled."
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"duepg_{page - 1}_{stamp}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"duepg_{page + 1}_{stamp}"))
+    if nav:
+        keyboard.append(nav)
+    return text, InlineKeyboardMarkup(keyboard) if keyboard else None
+
+
 async def check_payment_dues(bot, db, admin_id):
-    """Check for payments due tomorrow and send reminders to admin and users."""
+    """Check for payments due tomorrow: one admin digest, then member reminders fanned out concurrently."""
     try:
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%d-%m-%Y")
-        logger.info(f"🔔 Checking for payment dues on {tomorrow}")
-        
-        # Get all members with dues tomorrow
-        members_with_dues = db.get_members_with_due_date(tomorrow)
-        
-        if not members_with_dues:
+        tomorrow = datetime.now() + timedelta(days=1)
+        due_date = tomorrow.strftime("%Y-%m-%d")
+        logger.info(f"🔔 Checking for payment dues on {due_date}")
+
+        # 1. Gather: one pass over the dues index (single Payment_History read)
+        dues = db.get_members_with_due_date(due_date)
+        if not dues:
             logger.info("✅ No payment dues tomorrow")
             return
-        
-        logger.info(f"📊 Found {len(members_with_dues)} members with dues tomorrow")
-        
-        for member in members_with_dues: # Assuming 'members' in the instruction meant 'members_with_dues'
-            user_id = member.get('User ID')
-            name = member.get('Full Name', 'Member')
-            
-            # Get dues from Payment_History instead of member record
-            # The original code already extracts due_amount and due_date from 'member'
-            # This part of the instruction seems to imply a different data structure or DB call
-            # For faithful reproduction, we'll use the existing member data if get_member_dues is not available
-            # or assume get_member_dues returns the relevant info for the current member.
-            # Given the original code structure, we'll use the member's data directly.
-            # If db.get_member_dues(user_id) is intended, it would need to be implemented.
-            # For now, we'll adapt the instruction to fit the existing 'member' structure.
-            
-            # Original code extracts these directly from 'member':
-            phone = member.get('Phone', 'N/A')
-            plan = member.get('Plan', 'N/A')
-            duration = member.get('Duration (Months)', 'N/A')
-            due_amount = member.get('Due Amount', '0')
-            due_date = member.get('Due Date', tomorrow) # This is already tomorrow's date based on initial query
-            
-            # Skip if no due amount
-            if not due_amount or due_amount == '0':
-                continue
-            
-            # Check if due date is tomorrow (already filtered by get_members_with_due_date)
-            # This check is redundant if get_members_with_due_date is accurate.
-            # However, to faithfully apply the instruction's logic:
-            if due_date == tomorrow:
-                try:
-                    # Send admin notification with inline buttons
-                    await send_admin_due_reminder(
-                        bot, admin_id, user_id, name, phone, 
-                        plan, duration, due_amount, due_date
-                    )
-                    
-                    # Send user reminder (adapted from instruction to use 'bot' and existing function)
-                    await send_user_due_reminder(
-                        bot, user_id, name, due_amount, due_date
-                    )
-                    logger.info(f"✅ Sent due date reminder to {name} ({user_id})")
-                except Exception as e:
-                    logger.error(f"❌ Failed to send reminder to {user_id}: {e}")
-        
-        logger.info("✅ Payment reminders sent successfully")
-        
-    except Exception as e:
-        logger.error(f"❌ Error checking payment dues: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.info(f"📊 Found {len(dues)} members with dues tomorrow")
+
+        log = get_reminder_log()
+
+        # 2. Admin digest: one paginated message instead of one per member
+        if not log.get("digest", due_date):
+            text, markup = render_due_digest(dues, due_date, 0, log)
+            await bot.send_message(chat_id=admin_id, text=text, parse_mode="Markdown",
+                                   reply_markup=markup, rate_limit_args=BULK_SEND)
+            log.update("digest", due_date, sent=datetime.now().isoformat(timespec="seconds"))
+            log.save()
+
+        # 3. Member reminders, skipping anyone already reminded for this due date
+        pending = [m for m in dues if not log.get(m.get('User ID'), due_date).get("reminded")]
+        sem = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+        async def remind(member):
+            async with sem:
+                ok = await send_user_due_reminder(
+                    bot, member.get('User ID'), member.get('Full Name', 'Member'),
+                    member.get('Due Amount', '0'), tomorrow.strftime("%d-%m-%Y")
+                )
+            if ok:
+                log.update(member.get('User ID'), due_date, reminded=datetime.now().isoformat(timespec="seconds"))
+
+        await asyncio.gather(*(remind(m) for m in pending))
+        log.save()
+        logger.info(f"✅ Payment reminders sent: {len(pending)} members ({len(dues) - len(pending)} already reminded)")
 
-async def send_admin_due_reminder(bot, admin_id, user_id, name, phone, plan, duration, due_amount, due_date):
-    """Send payment reminder to admin with inline buttons."""
-    try:
-        message = (
-            f"💰 *PAYMENT DUE REMINDER*\n"
-            f"━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"👤 *Name*: {name}\n"
-            f"📱 *Phone*: {phone}\n"
-            f"💳 *Plan*: {plan} ({duration} months)\n\n"
-            f"⚠️ *Due Amount*: ₹{due_amount}\n"
-            f"📅 *Due Date*: Tomorrow ({due_date})\n"
-        )
-        
-        # Inline buttons for admin action
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Mark as Paid", callback_data=f"paid_{user_id}"),
-                InlineKeyboardButton("⏰ Not Paid Yet", callback_data=f"notpaid_{user_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await bot.send_message(
-            chat_id=admin_id,
-            text=message,
-            parse_mode="Markdown",
-            reply_markup=reply_markup
-        )
-        
-        logger.info(f"✅ Admin reminder sent for {name}")
-        
     except Exception as e:
-        logger.error(f"❌ Error sending admin reminder: {e}")
+        logger.error(f"❌ Error checking payment dues: {e}", exc_info=True)
 
-async def send_user_due_reminder(bot, user_id, name, due_amount, due_date):
+async def send_user_due_reminder(bot, user_id, name, due_amount, due_date) -> bool:
     """Send payment reminder to user."""
     try:
         message = (
@@ -122,22 +171,25 @@ async def send_user_due_reminder(bot, user_id, name, due_amount, due_date):
             f"Please make the payment at your earliest convenience.\n\n"
             f"Thank you! 🙏"
         )
-        
+
         await bot.send_message(
             chat_id=user_id,
             text=message,
-            parse_mode="Markdown"
+            parse_mode="Markdown",
+            rate_limit_args=BULK_SEND
         )
-        
+
         logger.info(f"✅ User reminder sent to {name}")
-        
+        return True
+
     except Exception as e:
         logger.error(f"❌ Error sending user reminder to {user_id}: {e}")
+        return False
 
 def start_scheduler(bot, db, admin_id):
     """Start the payment reminder scheduler."""
     scheduler = AsyncIOScheduler()
-    
+
     # Run daily at 9:00 AM
     scheduler.add_job(
         check_payment_dues,
@@ -146,8 +198,8 @@ def start_scheduler(bot, db, admin_id):
         minute=0,
         args=[bot, db, admin_id]
     )
-    
+
     # Don't call scheduler.start() here - it will be started by the event loop
     logger.info("🚀 Payment reminder scheduler configured (runs daily at 9:00 AM)")
-    
+
     return scheduler
@@ -0,0 +1,59 @@
+"""
+Worksheet Change Detection
+Fingerprints worksheet contents so unchanged sheets are not reparsed on every refresh
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from gspread.utils import numericise_all, to_records
+
+
+def fingerprint(values: List[List[Any]]) -> Tuple[int, str]:
+    """Row count plus a content hash of the raw cell values."""
+    digest = hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return len(values), digest
+
+
+def values_to_records(values: List[List[Any]]) -> List[Dict[str, Any]]:
+    """Same shape as `get_all_records()` (numericised values keyed by the header row)."""
+    if not values:
+        return []
+    header, rows = values[0], values[1:]
+    width = len(header)
+    rows = [numericise_all((row + [""] * width)[:width]) for row in rows]
+    return to_records(header, rows)
+
+
+class SheetChangeTracker:
+    """Remembers the last seen fingerprint per worksheet and the spreadsheet revision marker."""
+
+    def __init__(self):
+        self._fingerprints: Dict[str, Tuple[int, str]] = {}
+        self._revision: Optional[str] = None
+
+    def is_current(self, revision: Optional[str]) -> bool:
+        """True if the spreadsheet-level revision marker has not moved since the last probe."""
+        return revision is not None and revision == self._revision
+
+    def mark_revision(self, revision: Optional[str]) -> None:
+        """Remember the revision marker a successful probe was taken at."""
+        self._revision = revision
+
+    def has_changed(self, name: str, values: List[List[Any]]) -> bool:
+        """Compare against the stored fingerprint and remember the new one."""
+        fp = fingerprint(values)
+        if self._fingerprints.get(name) == fp:
+            return False
+        self._fingerprints[name] = fp
+        return True
+
+    def forget(self, name: Optional[str] = None) -> None:
+        """Drop fingerprints so the next probe reparses (all sheets if name is None)."""
+        if name is None:
+            self._fingerprints.clear()
+            self._revision = None
+        else:
+            self._fingerprints.pop(name, None)
+            self._revision = None
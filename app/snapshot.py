@@ -0,0 +1,44 @@
+"""
+Immutable Cache Snapshots
+Everything handlers read from the cache, built off to the side and published with one reference swap
+"""
+
+import time
+from typing import Any, Dict, NamedTuple, Tuple
+
+from app.attendance_store import AttendanceStore
+from app.member_sync import MemberIndex
+
+
+class CacheSnapshot(NamedTuple):
+    """
+    One consistent version of the cache. Never mutated after publishing; refreshes build a new one.
+    Row dicts are shared between snapshots, so readers must copy before annotating them.
+    The attendance store included: check-ins, check-outs and tail loads publish an edited copy.
+    """
+    members: MemberIndex
+    attendance: AttendanceStore
+    workouts: Tuple[Dict[str, Any], ...]  # Recent attendance rows as dicts (newest last)
+    classes: Tuple[Dict[str, Any], ...]
+    machines: Tuple[Dict[str, Any], ...]
+    built_at: float
+
+    def as_data(self) -> Dict[str, Any]:
+        """Legacy `db.data` view over this snapshot (no copying)."""
+        return {
+            "members": self.members.members,
+            "workouts": self.workouts,
+            "classes": self.classes,
+            "machines": self.machines,
+        }
+
+
+def empty_snapshot() -> CacheSnapshot:
+    return CacheSnapshot(
+        members=MemberIndex(),
+        attendance=AttendanceStore(),
+        workouts=(),
+        classes=(),
+        machines=(),
+        built_at=time.time(),
+    )
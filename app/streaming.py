@@ -0,0 +1,65 @@
+"""
+Streaming Replies
+Posts a placeholder and edits it as AI text arrives, throttled to stay within Telegram's edit limits
+"""
+
+import os
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))  # Seconds between edits
+STREAM_MIN_CHARS = 40  # Don't spend an edit on a handful of new characters
+MAX_MESSAGE_LENGTH = 4096
+
+
+async def _edit(message: Message, text: str, markdown: bool = False) -> None:
+    try:
+        await message.edit_text(text, parse_mode="Markdown" if markdown else None)
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return
+        if markdown:
+            # Model output is not always valid Telegram Markdown: show it plain rather than not at all
+            await _edit(message, text)
+            return
+        raise
+
+
+async def reply_streaming(message: Message, chunks: AsyncIterator[str], reply_markup=None,
+                          placeholder: str = "⏳ Thinking...",
+                          interval: float = STREAM_EDIT_INTERVAL) -> Optional[str]:
+    """
+    Reply to `message` with text streamed from `chunks`. Intermediate edits are plain text
+    (half-written Markdown often fails to parse); the final edit applies Markdown.
+    Returns the full text, or None if nothing could be sent.
+    """
+    loop = asyncio.get_running_loop()
+    sent = await message.reply_text(placeholder, reply_markup=reply_markup)
+    text, shown, last_edit = "", "", loop.time()
+
+    async for piece in chunks:
+        text += piece
+        now = loop.time()
+        if now - last_edit >= interval and len(text) - len(shown) >= STREAM_MIN_CHARS:
+            shown = text[:MAX_MESSAGE_LENGTH - 2]
+            try:
+                await _edit(sent, shown + " ▌")
+            except RetryAfter as e:
+                logger.warning(f"⏳ Streaming edit throttled for {e.retry_after}s")
+            except BadRequest as e:
+                logger.warning(f"⚠️ Streaming edit failed: {e}")
+            last_edit = loop.time()
+
+    text = text.strip()[:MAX_MESSAGE_LENGTH] or "🤔 I couldn't come up with an answer. Please try again."
+    try:
+        await _edit(sent, text, markdown=True)
+    except BadRequest as e:
+        logger.error(f"❌ Final streaming edit failed: {e}")
+        return None
+    return text
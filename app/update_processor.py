@@ -0,0 +1,65 @@
+"""
+Concurrent Update Processing
+Different chats are handled in parallel; updates from the same chat still run strictly in order
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from app.ingest import shard_key
+
+logger = logging.getLogger(__name__)
+
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "16"))
+
+# PTB holds its own semaphore *before* our per-chat lock; keep it out of the way so a burst from
+# one chat cannot park every worker slot while waiting its turn. The real limit is `workers`.
+_UNBOUNDED = 10_000
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Up to `workers` updates run at once, but never two from the same chat, so conversation
+    steps (GET_NAME -> GET_PHONE ...) keep their order.
+    """
+
+    def __init__(self, workers: int = BOT_WORKERS):
+        super().__init__(max_concurrent_updates=_UNBOUNDED)
+        self.workers = workers
+        self._slots = asyncio.BoundedSemaphore(workers)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._waiting: Dict[int, int] = {}
+        self.processed = 0
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = shard_key(update) if isinstance(update, Update) else 0
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            async with lock:  # FIFO: same-chat updates run in arrival order
+                async with self._slots:
+                    await coroutine
+                    self.processed += 1
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                self._locks.pop(key, None)
+
+    async def initialize(self) -> None:
+        logger.info(f"⚙️ Processing updates concurrently: {self.workers} workers, ordered per chat")
+
+    async def shutdown(self) -> None:
+        pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "active_chats": len(self._locks),
+            "processed": self.processed,
+        }
@@ -1,3 +1,4 @@
+import os
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
@@ -8,11 +9,20 @@ from app.constants import (
     GET_PLAN, GET_DURATION, GET_AMOUNT, GET_DUE_DATE, ADMIN_ID
 )
 from app.ui import get_keyboard, BUTTON_TO_INTENT
-from app.intent import detect_intent
+from app.intent import detect_intent, detect_intent_and_answer, AI_COMBINED
+from app.inflight import InFlightGuard
+from app.ai import stream_ai
+from app.streaming import reply_streaming
+from app.plan_cache import plan_cache, plan_signature
 # from app.responses import handle_intent # Move inside to prevent circular issues
 
 logger = logging.getLogger(__name__)
 
+AI_STREAMING = os.getenv("AI_STREAMING", "true").lower() == "true"
+
+# Repeated taps of one button (or the same question) while the first is still being answered
+press_guard = InFlightGuard()
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """The /start command - Logic varies for members vs newcomers."""
     user = update.effective_user
@@ -105,10 +115,28 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Map button text to intent
     intent = BUTTON_TO_INTENT.get(text)
-    
-    # AI detection if not a button
+
+    # Absorb repeats of the same button/question sent while the first one was still in flight
+    key = intent or f"text:{text.lower()}"
+    state, duplicate = await press_guard.run(
+        user.id, key, update.message.date.timestamp(),
+        lambda: _dispatch_message(update, context, text, intent)
+    )
+    if duplicate:
+        logger.info(f"🔁 Absorbed repeated '{key}' from {user.id}")
+    return state
+
+async def _dispatch_message(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, intent):
+    """Routes one message to its hub handler, static reply or the AI."""
+    user = update.effective_user
+
+    # AI detection if not a button (combined mode: one LLM call classifies and, if needed, answers)
+    answer = None
     if not intent:
-        intent = detect_intent(text)
+        if AI_COMBINED:
+            intent, answer = await detect_intent_and_answer(text)
+        else:
+            intent = await detect_intent(text)
     
     print(f"👤 User ({user.id}): {text} | 🤖 Intent: {intent}")
 
@@ -162,14 +190,29 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if intent in hub_handlers:
         return await hub_handlers[intent](update, context)
 
-    # 2. Handle Static Queries
-    from app.responses import handle_intent as process_intent
-    response = process_intent(intent, text, user_id=user.id)
+    # 2. Already answered by the combined classify-and-answer call
+    from app.responses import handle_intent as process_intent, PLAN_INTENTS, plan_prompt, plan_sections
+    if answer:
+        await update.message.reply_text(answer, reply_markup=get_keyboard(intent, user.id), parse_mode="Markdown")
+        return IDLE
+
+    # 3. AI plans: stream into the chat instead of making the member wait for the whole answer
+    signature = plan_signature(intent, text) if intent in PLAN_INTENTS else None
+    if intent in PLAN_INTENTS and AI_STREAMING and not plan_cache.get(signature):
+        print(f"🧠 Streaming {intent} plan for: {text}")
+        stream = stream_ai(plan_prompt(intent, text), sections=plan_sections(intent))
+        plan = await reply_streaming(update.message, stream, reply_markup=get_keyboard(intent, user.id))
+        if stream.ok:  # Never keep a cut-off, failed or empty answer
+            plan_cache.set(signature, plan)
+        return IDLE
+
+    # 4. Handle Static Queries
+    response = await process_intent(intent, text, user_id=user.id)
     
-    # 3. AI Backup
+    # 5. AI Backup
     if response is None or "I'm not sure" in response:
-        from app.ai import ask_ai
-        response = ask_ai(text)
+        from app.ai import ask_ai_async
+        response = await ask_ai_async(text)
 
     await update.message.reply_text(response, reply_markup=get_keyboard(intent, user.id), parse_mode="Markdown")
     return IDLE
@@ -923,6 +966,8 @@ async def handle_view_attendance(update: Update, context: ContextTypes.DEFAULT_T
             msg += f" ({duration})"
     
     msg += "\n\n💪 Keep up the great work!"
+    if db and db.is_stale:
+        msg += "\n\n_⚠️ Showing saved data - live records are temporarily unavailable._"
     
     await update.message.reply_text(
         msg,
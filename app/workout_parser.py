@@ -0,0 +1,152 @@
+"""
+Workout Log Parser
+Reads "Log Running 30 mins" / "bench press 3x10 @ 60kg" style messages without an LLM call
+"""
+
+import re
+from typing import Dict, Optional
+
+# Canonical activity -> phrases people type (matched longest first)
+ACTIVITIES = {
+    "Running": ("running", "run", "ran", "jogging", "jog", "treadmill"),
+    "Walking": ("walking", "walk", "walked"),
+    "Cycling": ("cycling", "cycle", "cycled", "bike", "biking", "spinning"),
+    "Swimming": ("swimming", "swim", "swam"),
+    "Rowing": ("rowing", "row machine", "rower"),
+    "Skipping": ("skipping", "jump rope", "rope"),
+    "Cardio": ("cardio", "elliptical", "cross trainer", "stairmaster", "stair climber"),
+    "HIIT": ("hiit", "circuit", "crossfit", "tabata"),
+    "Yoga": ("yoga",),
+    "Zumba": ("zumba", "aerobics", "dance"),
+    "Stretching": ("stretching", "stretch", "mobility"),
+    "Bench Press": ("bench press", "bench", "chest press"),
+    "Incline Bench Press": ("incline bench press", "incline bench", "incline press"),
+    "Squats": ("squats", "squat", "back squat", "front squat"),
+    "Deadlift": ("deadlifts", "deadlift", "rdl", "romanian deadlift"),
+    "Overhead Press": ("overhead press", "shoulder press", "ohp", "military press"),
+    "Pull-ups": ("pull ups", "pullups", "pull-ups", "chin ups", "chinups"),
+    "Push-ups": ("push ups", "pushups", "push-ups"),
+    "Lat Pulldown": ("lat pulldown", "pulldown", "lat pull down"),
+    "Rows": ("barbell rows", "dumbbell rows", "cable rows", "rows"),
+    "Bicep Curls": ("bicep curls", "biceps curls", "curls", "curl"),
+    "Tricep Extensions": ("tricep extensions", "triceps extensions", "tricep pushdown", "pushdowns", "dips"),
+    "Leg Press": ("leg press",),
+    "Lunges": ("lunges", "lunge"),
+    "Plank": ("plank", "planks"),
+    "Crunches": ("crunches", "crunch", "situps", "sit ups", "sit-ups"),
+    "Chest Workout": ("chest day", "chest workout", "chest"),
+    "Back Workout": ("back day", "back workout"),
+    "Leg Workout": ("leg day", "legs day", "legs workout", "leg workout", "legs"),
+    "Arm Workout": ("arm day", "arms day", "arms workout", "arms"),
+    "Shoulder Workout": ("shoulder day", "shoulders day", "shoulders"),
+    "Full Body Workout": ("full body", "full-body"),
+    "Weight Training": ("weight training", "weights", "gym session", "strength training"),
+}
+_PHRASES = sorted(((p, name) for name, ps in ACTIVITIES.items() for p in ps), key=lambda x: -len(x[0]))
+
+_LEAD = re.compile(r"^(please\s+)?(log|add|record|save|track|note)?\s*(my\s+)?(workout\s*[:\-]?\s*)?"
+                   r"((today|just|i|i've|ive|have)\s+)*(did|done|completed|finished|went|had)?\s*"
+                   r"((a|an|some)(?!\s+(hour|half)\b))?\s+", re.I)
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)\b", re.I)
+_HALF_HOUR = re.compile(r"\b(half an hour|an hour and a half|an hour)\b", re.I)
+_SETS_REPS = re.compile(r"(\d+)\s*(?:x|×|\*)\s*(\d+)|(\d+)\s*sets?\s*(?:of|x)?\s*(\d+)\s*(?:reps?)?", re.I)
+_WEIGHT = re.compile(r"@?\s*(\d+(?:\.\d+)?)\s*(kg|kgs|lbs?|pounds)\b", re.I)
+_DISTANCE = re.compile(r"(\d+(?:\.\d+)?)\s*(km|kms|k|miles?|mi)\b", re.I)
+_SETS_ONLY = re.compile(r"\b(\d+)\s*sets?\b", re.I)
+_COUNT = re.compile(r"\b(\d+)\s+(?:reps?\s+)?(?=[a-z])", re.I)
+_JOINER = re.compile(r"^\s*(and\s+)?$", re.I)  # What may separate parts of one duration: "1 hr 30 min", "1h and 15m"
+_NOISE = re.compile(r"\b(i|my|me|for|of|at|in|with|and|today|reps?|sets?|mins?|minutes?)\b", re.I)
+
+
+def _minutes(value: float, unit: str) -> float:
+    unit = unit.lower()
+    if unit.startswith("h"):
+        return value * 60
+    if unit.startswith("s"):
+        return value / 60
+    return value
+
+
+def _format_minutes(minutes: float) -> str:
+    minutes = int(round(minutes))
+    if minutes >= 60 and minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    if minutes > 60:
+        return f"{minutes // 60}h{minutes % 60}m"
+    return f"{max(minutes, 1)}m"
+
+
+def parse_workout(message: str) -> Optional[Dict[str, str]]:
+    """
+    {"type", "duration", "notes"} in the same shape the LLM extraction returns, or None when the
+    message is not confidently understood (then the caller asks the LLM).
+    """
+    text = " ".join(message.replace("📝", " ").split())
+    text = _LEAD.sub("", text + " ", count=1).strip() or text
+    notes = []
+    duration = None
+
+    # Distance first: "5 mi" must not be read as "5 minutes" by the duration pattern
+    distance = _DISTANCE.search(text)
+    if distance:
+        notes.append(f"{distance.group(1)} {distance.group(2).lower()}")
+        text = text.replace(distance.group(0), " ")
+
+    found = list(_DURATION.finditer(text))
+    half = _HALF_HOUR.search(text)
+    if found:
+        if half or any(not _JOINER.match(text[a.end():b.start()]) for a, b in zip(found, found[1:])):
+            return None  # Several separate durations ("30 mins run then 20 mins cycling"): let the LLM split them
+        duration = _format_minutes(sum(_minutes(float(m.group(1)), m.group(2)) for m in found))
+        text = text[:found[0].start()] + " " + text[found[-1].end():]
+    elif half:
+        duration = {"half an hour": "30m", "an hour": "1h", "an hour and a half": "1h30m"}[half.group(1).lower()]
+        text = text.replace(half.group(0), " ")
+
+    sets = _SETS_REPS.search(text)
+    if sets:
+        n_sets, reps = (sets.group(1), sets.group(2)) if sets.group(1) else (sets.group(3), sets.group(4))
+        notes.append(f"{n_sets}x{reps}")
+        text = text.replace(sets.group(0), " ")
+    weight = _WEIGHT.search(text)
+    if weight:
+        notes.append(f"@ {weight.group(1)}{weight.group(2).lower()}")
+        text = text.replace(weight.group(0), " ")
+    only_sets = None if sets else _SETS_ONLY.search(text)
+    if only_sets:
+        notes.append(f"{only_sets.group(1)} sets")
+        text = text.replace(only_sets.group(0), " ")
+    elif not sets:
+        # "20 pushups" / "20 reps pushups": a bare count only when an exercise or "reps" follows it
+        count = _COUNT.search(text)
+        after = f" {text[count.end():].lower()}" if count else ""
+        if count and (count.group(0).rstrip().lower().endswith(("rep", "reps"))
+                      or any(after.startswith(f" {phrase} ") or after == f" {phrase}" for phrase, _ in _PHRASES)):
+            notes.append(f"{count.group(1)} reps")
+            text = text.replace(count.group(0), " ", 1)
+
+    lowered = f" {text.lower()} "
+    activity = None
+    for phrase, name in _PHRASES:
+        if f" {phrase} " in lowered:
+            activity = name
+            lowered = lowered.replace(f" {phrase} ", " ", 1)
+            break
+    if activity and any(f" {phrase} " in lowered for phrase, _ in _PHRASES):
+        return None  # More than one activity: one log entry can't hold them
+
+    leftover = " ".join(_NOISE.sub(" ", lowered).split())
+    if re.search(r"\d", leftover):
+        return None  # A number we couldn't place (laps, rounds, calories...)
+    if activity is None:
+        # Unknown activity: accept a short name only when the message clearly is a log entry
+        if not (duration or notes) or not leftover or len(leftover.split()) > 3:
+            return None
+        activity = leftover.title()
+        leftover = ""
+    elif len(leftover.split()) > 4:
+        return None  # Lots of unexplained words: let the LLM read it
+
+    if leftover:
+        notes.append(leftover)
+    return {"type": activity, "duration": duration or "60m", "notes": ", ".join(notes)}
@@ -0,0 +1,31 @@
+import unittest
+
+from app.intent_model import classify, load_examples
+
+
+class IntentModelTest(unittest.TestCase):
+    def test_training_phrases_classify_to_their_labels(self):
+        for intent, texts in load_examples().items():
+            for text in texts:
+                with self.subTest(text=text):
+                    self.assertEqual(classify(text)[0], intent)
+
+    def test_short_faq_messages_resolve_locally(self):
+        cases = {
+            "fees": "fees", "fee": "fees", "what are the fees": "fees",
+            "timings": "gym_timing", "when do you open": "gym_timing",
+            "diet plan": "diet", "workout plan": "workout",
+        }
+        for text, intent in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(classify(text)[0], intent)
+
+    def test_log_rule_needs_workout_content(self):
+        self.assertEqual(classify("log running 30 mins")[:3:2], ("log_workout", "rule"))
+        for text in ("track my membership status", "record my attendance"):
+            with self.subTest(text=text):
+                self.assertNotEqual(classify(text)[0], "log_workout")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from app.plan_cache import plan_signature
+
+
+class PlanSignatureTest(unittest.TestCase):
+    def test_diet_types(self):
+        cases = {
+            "non veg diet plan": "non_veg", "non-veg diet plan": "non_veg", "non vegetarian diet": "non_veg",
+            "veg diet plan": "veg", "vegetarian diet plan": "veg", "vegan diet": "vegan",
+        }
+        for text, diet in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(plan_signature("diet", text)[4], diet)
+
+
+if __name__ == "__main__":
+    unittest.main()